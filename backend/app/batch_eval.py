@@ -0,0 +1,178 @@
+"""
+Re-run the transcript evaluation over finished sessions, e.g. after a rubric change.
+
+    cd backend && python -m app.batch_eval [--version 2] [--concurrency 8] [--rate 4]
+        [--checkpoint data/batch_eval.json] [--stub --stub-latency 0.5] [--limit N]
+
+Sessions are read in pages ordered by id (keyset, so the scan never slows
+down with offset). Each page is evaluated concurrently, at most --rate LLM
+calls per second, and one Evaluation row per session is written under
+--version; sessions that already have a row for that version are skipped, so
+a run can be stopped and started again. The checkpoint file records the last
+fully processed id and is resumed from when it matches --version.
+
+--stub swaps the LLM for a canned response after --stub-latency seconds, for
+offline runs and throughput benchmarks. A JSON summary is printed at the end.
+"""
+import os, json, time, logging, argparse, threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlmodel import Session, select
+
+from .db import engine, init_db
+from .models import InterviewSession, Evaluation
+from .services import evaluator, llm_cache
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket shared by the worker threads: at most `rate` acquisitions per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def stub_kickoff(latency: float):
+    def kickoff(crew) -> str:
+        time.sleep(latency)
+        return json.dumps({
+            "technical": 70, "communication": 70, "confidence": 70,
+            "strengths": ["stub"], "summary": "Stub evaluation.", "rubric": {"note": "stub"},
+        })
+    return kickoff
+
+
+def _page(after_id: str, size: int) -> list[tuple[str, str, str, str | None]]:
+    with Session(engine) as db:
+        rows = db.exec(
+            select(InterviewSession.id, InterviewSession.role, InterviewSession.difficulty, InterviewSession.domain)
+            .where(InterviewSession.status == "finished", InterviewSession.id > after_id)
+            .order_by(InterviewSession.id)
+            .limit(size)
+        ).all()
+    return [tuple(r) for r in rows]
+
+
+def _evaluate_one(session, version: str, limiter: RateLimiter, kickoff) -> str:
+    session_id, role, difficulty, domain = session
+    with Session(engine) as db:
+        if evaluator.find_evaluation(db, session_id, version) is not None:
+            return "skipped"
+        qas = evaluator.build_qas(session_id, db)
+    # no connection is held across the LLM call
+    limiter.acquire()
+    # cached under --version, so a new version never reuses another version's responses
+    ev = evaluator.evaluate_qas(qas, role, difficulty, domain, fallback=False, kickoff=kickoff, version=version)
+    with Session(engine) as db:
+        db.add(Evaluation(
+            session_id=session_id,
+            technical=ev["technical"],
+            communication=ev.get("communication", 70),
+            confidence=ev["confidence"],
+            strengths=ev["strengths"],
+            summary=ev["summary"],
+            rubric_json=ev.get("rubric"),
+            rubric_version=version,
+        ))
+        db.commit()
+    return "evaluated"
+
+
+def _load_checkpoint(path: str, version: str) -> str:
+    if not path or not os.path.exists(path):
+        return ""
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("last_id", "") if data.get("version") == version else ""
+
+
+def _save_checkpoint(path: str, version: str, last_id: str):
+    if not path:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": version, "last_id": last_id}, f)
+    os.replace(tmp, path)
+
+
+def run(version: str, concurrency: int, rate: float, page_size: int, checkpoint: str | None,
+        kickoff=None, limit: int | None = None) -> dict:
+    limiter = RateLimiter(rate, burst=max(1, concurrency))
+    counts = {"evaluated": 0, "skipped": 0, "failed": 0}
+    last_id = _load_checkpoint(checkpoint, version)
+    resumed_from = last_id or None
+    t0 = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-eval") as pool:
+        while limit is None or sum(counts.values()) < limit:
+            size = page_size if limit is None else min(page_size, limit - sum(counts.values()))
+            page = _page(last_id, size)
+            if not page:
+                break
+            futures = [(s[0], pool.submit(_evaluate_one, s, version, limiter, kickoff)) for s in page]
+            for session_id, fut in futures:
+                try:
+                    counts[fut.result()] += 1
+                except Exception as e:
+                    logger.error(f"Evaluation of {session_id} failed: {e}")
+                    counts["failed"] += 1
+            # a page is only checkpointed once every session in it is done;
+            # failed ones are picked up again on a run without the checkpoint
+            last_id = page[-1][0]
+            _save_checkpoint(checkpoint, version, last_id)
+            logger.info(f"through {last_id}: {counts}")
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "version": version,
+        "resumed_from": resumed_from,
+        "last_id": last_id or None,
+        **counts,
+        "elapsed_s": round(elapsed, 2),
+        "sessions_per_s": round(counts["evaluated"] / elapsed, 2) if elapsed else 0.0,
+        "concurrency": concurrency,
+        "rate": rate,
+        "stub": kickoff is not None,
+        "llm_cache": llm_cache.cache.stats(),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--version", default=evaluator.RUBRIC_VERSION, help="rubric version to write (default RUBRIC_VERSION)")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=2.0, help="max LLM calls per second, 0 for unlimited")
+    ap.add_argument("--page-size", type=int, default=200)
+    ap.add_argument("--checkpoint", default="data/batch_eval.json", help="'' to disable")
+    ap.add_argument("--limit", type=int, default=None, help="stop after this many sessions")
+    ap.add_argument("--stub", action="store_true", help="use a canned LLM response instead of Gemini")
+    ap.add_argument("--stub-latency", type=float, default=0.5)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    kickoff = stub_kickoff(args.stub_latency) if args.stub else None
+    report = run(args.version, args.concurrency, args.rate, args.page_size, args.checkpoint, kickoff, args.limit)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,13 @@
-from crewai import LLM, Agent
-import os
-
 INTRO_TEMPLATE = (
     "Hello! I'm your AI interviewer. We'll have a short 15-minute audio interview. "
     "I'll start with a quick intro from you, then a few targeted questions with possible follow-ups. Ready?"
 )
-# Set your Gemini API key
-os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
+FOLLOW_UP_PROMPT = "Could you elaborate more on that? Please provide a specific example."
+CLOSING_PROMPT = "Thank you for your answers. That concludes our interview. Do you have any questions for me?"
+# Prompts whose audio never changes; synthesized once at startup
+FIXED_PROMPTS = [INTRO_TEMPLATE, FOLLOW_UP_PROMPT, CLOSING_PROMPT]
 
-# Initialize Gemini LLM
-llm = LLM(model="gemini/gemini-2.0-flash",temperature=0.7)
+# InterviewBrain is rule-based: it makes no LLM calls, so it builds no Agent
 class InterviewBrain:
     def __init__(self, role: str, difficulty: str, domain: str|None, qas: list[dict]):
         self.role = role
@@ -17,17 +15,37 @@ class InterviewBrain:
         self.domain = domain
         self.qas = qas
         self.current_question_index = -1
-        self.agent = Agent(
-            name="InterviewAgent", 
-            role="Interviewer", 
-            goal="Conduct live interview",
-            backstory=f"Hiring for {role} ({difficulty}) domain={domain}",
-            llm=llm
-        )
         self.opened = False
         self.last_user_response = None
         self.asked_questions = set()
 
+    def snapshot(self) -> dict:
+        """The brain's progress as plain JSON-able data, for the session-state store."""
+        return {
+            "current_question_index": self.current_question_index,
+            "asked_questions": sorted(self.asked_questions),
+            "last_user_response": self.last_user_response,
+            "opened": self.opened,
+        }
+
+    def restore(self, state: dict):
+        self.current_question_index = state["current_question_index"]
+        self.asked_questions = set(state["asked_questions"])
+        self.last_user_response = state["last_user_response"]
+        self.opened = state["opened"]
+
+    def upcoming_prompts(self) -> list[str]:
+        """
+        Everything next_prompt() can return for the answer in progress: the next
+        planned question (or the closing line) and the elaboration follow-up.
+        """
+        idx = self.current_question_index + 1
+        if idx < len(self.qas) and self.qas[idx]["question"] not in self.asked_questions:
+            upcoming = self.qas[idx]["question"]
+        else:
+            upcoming = CLOSING_PROMPT
+        return [upcoming, FOLLOW_UP_PROMPT]
+
     def next_prompt(self, user_response: str|None = None) -> str:
         self.last_user_response = user_response
         self.opened = True
@@ -39,7 +57,7 @@ class InterviewBrain:
         if user_response and len(user_response.split()) > 3:  # Only follow up if response has some substance
             # Check if we should ask a follow-up based on response quality
             if len(user_response.split()) < 10:  # Short response might need follow-up
-                return "Could you elaborate more on that? Please provide a specific example."
+                return FOLLOW_UP_PROMPT
             else:
                 # Response is substantial, move to next question
                 self.current_question_index += 1
@@ -55,4 +73,4 @@ class InterviewBrain:
                 return next_question
         
         # End of questions
-        return "Thank you for your answers. That concludes our interview. Do you have any questions for me?"
\ No newline at end of file
+        return CLOSING_PROMPT
\ No newline at end of file
@@ -0,0 +1,99 @@
+import os, json, threading
+from typing import TYPE_CHECKING
+
+from ..services.llm_cache import cache, cache_key
+from ..services.metrics import span
+
+if TYPE_CHECKING:
+    from crewai import Task
+
+# crewai (and litellm under it) takes seconds and a lot of memory to import,
+# so nothing here imports it until the first LLM call needs it
+
+GEMINI_MODEL = "gemini/gemini-2.0-flash"
+
+_lock = threading.Lock()
+_llms: dict[float, object] = {}
+_local = threading.local()
+_kickoff = None
+
+
+def get_llm(temperature: float = 1.0):
+    """The process-wide Gemini LLM for this temperature, created on first use."""
+    with _lock:
+        llm = _llms.get(temperature)
+        if llm is None:
+            from crewai import LLM
+            if os.getenv("GEMINI_API_KEY"):
+                os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
+            llm = _llms[temperature] = LLM(model=GEMINI_MODEL, temperature=temperature)
+        return llm
+
+
+def set_kickoff(fn):
+    """
+    Answer every LLM call with fn(crew) -> str instead of Gemini (e.g. a fake
+    with a set latency in load tests); None restores the real model.
+    """
+    global _kickoff
+    _kickoff = fn
+
+
+def llm_available() -> bool:
+    return _kickoff is not None or bool(os.getenv("GEMINI_API_KEY"))
+
+
+def thread_agent(name: str, factory):
+    """
+    An Agent built by factory() once per thread and reused after that. Agents
+    keep per-run state while a crew executes, so they aren't shared across
+    threads; the LLM they wrap is.
+    """
+    agents = getattr(_local, "agents", None)
+    if agents is None:
+        agents = _local.agents = {}
+    agent = agents.get(name)
+    if agent is None:
+        agent = agents[name] = factory()
+    return agent
+
+
+def parse_json(text) -> object:
+    """The model's JSON output, without the markdown fence it sometimes adds."""
+    text = str(text).strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return json.loads(text.strip())
+
+
+def run_task(agent, task: "Task", validate=None, temperature: float = 1.0, namespace: str = "",
+             kickoff=None, use_cache: bool = True):
+    """
+    Run one Task on a single-agent Crew and return its parsed JSON, passed
+    through validate(data) (which normalizes it and raises if it is unusable).
+
+    Validated results are cached on disk by model, temperature, namespace and
+    the normalized prompt, so an identical call (a queue retry, a re-opened
+    rubric) skips the LLM and the parsing. `kickoff(crew) -> str` replaces
+    crew.kickoff(), e.g. with an offline stub, and bypasses the cache; one
+    installed with set_kickoff() stands in for the model and is cached as usual.
+    """
+    use_cache = use_cache and kickoff is None
+    if use_cache:
+        key = cache_key(GEMINI_MODEL, temperature, f"{task.description}\n{task.expected_output}", namespace)
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+    from crewai import Crew
+    crew = Crew(agents=[agent], tasks=[task], verbose=True)
+    kickoff = kickoff or _kickoff
+    with span("llm_call"):
+        data = parse_json(kickoff(crew) if kickoff else crew.kickoff())
+    if validate is not None:
+        data = validate(data)
+    if use_cache:
+        cache.put(key, data)
+    return data
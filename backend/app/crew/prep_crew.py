@@ -1,29 +1,34 @@
-import os
-import json
-from crewai import Agent, Crew, Task, LLM
-import google.generativeai as genai
+import logging
+from typing import TYPE_CHECKING
 
-# # Configure Gemini
-# genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-# Set your Gemini API key
-os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
+from .llm import get_llm, thread_agent, run_task
+from ..services.metrics import timed
+
+if TYPE_CHECKING:
+    from crewai import Task
+
+logger = logging.getLogger(__name__)
+
+def _build_agent():
+    from crewai import Agent
+    return Agent(
+        role="Question Preparation Specialist",
+        goal="Generate relevant interview questions based on role, difficulty, domain, and job description",
+        backstory="""You are an expert at creating targeted interview questions that assess 
+        candidates' skills, experience, and cultural fit for specific roles. You understand
+        how to tailor questions to different seniority levels and industry domains.""",
+        verbose=True,
+        allow_delegation=False,
+        llm=get_llm(temperature=1.0)
+    )
 
-# Initialize Gemini LLM
-llm = LLM(model="gemini/gemini-2.0-flash",temperature=1.0)
 class QuestionPreparationAgent:
     def __init__(self):
-        self.agent = Agent(
-            role="Question Preparation Specialist",
-            goal="Generate relevant interview questions based on role, difficulty, domain, and job description",
-            backstory="""You are an expert at creating targeted interview questions that assess 
-            candidates' skills, experience, and cultural fit for specific roles. You understand
-            how to tailor questions to different seniority levels and industry domains.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=llm
-        )
+        # built once per thread; the LLM behind it is shared
+        self.agent = thread_agent("question_preparation", _build_agent)
 
-    def create_task(self, role: str, difficulty: str, domain: str, jd: str) -> Task:
+    def create_task(self, role: str, difficulty: str, domain: str, jd: str) -> "Task":
+        from crewai import Task
         return Task(
             description=f"""Generate 6-10 interview questions for a {role} position at {difficulty} level.
             Domain: {domain}
@@ -42,54 +47,54 @@ class QuestionPreparationAgent:
             async_execution=False
         )
 
-def run_prep(role: str, difficulty: str, domain: str, jd: str) -> list[dict]:
+FALLBACK_QUESTIONS = [
+    {
+        "question": "Tell me about yourself and your experience relevant to this role.",
+        "ideal_answer": "A concise summary of professional background, highlighting key experiences and achievements that align with the role requirements."
+    },
+    {
+        "question": "What motivated you to apply for this position?",
+        "ideal_answer": "A response that shows understanding of the company/role and connects personal goals with the opportunity."
+    },
+    {
+        "question": "Describe a challenging project you worked on and how you approached it.",
+        "ideal_answer": "A specific example that demonstrates problem-solving skills, technical expertise, and collaboration (if applicable)."
+    },
+    {
+        "question": "How do you stay updated with the latest developments in your field?",
+        "ideal_answer": "Discussion of specific resources, communities, courses, or practices used for continuous learning."
+    },
+    {
+        "question": "Where do you see yourself in 3-5 years?",
+        "ideal_answer": "A response that shows ambition and growth mindset while aligning with potential career paths at the company."
+    }
+]
+
+def _validate_questions(data) -> list[dict]:
+    if not isinstance(data, list) or not data:
+        raise ValueError("Expected a non-empty JSON list of questions")
+    qas = []
+    for qa in data:
+        if not isinstance(qa, dict) or not qa.get("question") or not qa.get("ideal_answer"):
+            raise ValueError(f"Malformed question: {qa!r}")
+        qas.append({"question": str(qa["question"]), "ideal_answer": str(qa["ideal_answer"])})
+    return qas
+
+@timed("run_prep")
+def run_prep(role: str, difficulty: str, domain: str, jd: str, fallback: bool = True,
+             use_cache: bool = True) -> list[dict]:
     # Create the agent and task
     prep_agent = QuestionPreparationAgent()
     task = prep_agent.create_task(role, difficulty, domain, jd)
     
 
-    # Execute the task
+    # Execute the task (identical prompts are answered from the LLM cache)
     try:
-        crew = Crew(
-            agents=[prep_agent.agent],
-            tasks=[task],
-            verbose=True
-        )
-        result = crew.kickoff()
-        text = str(result)
-        
-        # Clean the response (remove markdown code blocks if present)
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-        text = text.strip()
-        
-        # Parse the JSON response
-        return json.loads(text)
+        return run_task(prep_agent.agent, task, _validate_questions, temperature=1.0, use_cache=use_cache)
         
-    except Exception as e:
-        print(f"Error in question preparation: {e}")
+    except Exception:
+        logger.exception("Error in question preparation")
+        if not fallback:
+            raise
         # Fallback questions
-        return [
-            {
-                "question": "Tell me about yourself and your experience relevant to this role.",
-                "ideal_answer": "A concise summary of professional background, highlighting key experiences and achievements that align with the role requirements."
-            },
-            {
-                "question": "What motivated you to apply for this position?",
-                "ideal_answer": "A response that shows understanding of the company/role and connects personal goals with the opportunity."
-            },
-            {
-                "question": "Describe a challenging project you worked on and how you approached it.",
-                "ideal_answer": "A specific example that demonstrates problem-solving skills, technical expertise, and collaboration (if applicable)."
-            },
-            {
-                "question": "How do you stay updated with the latest developments in your field?",
-                "ideal_answer": "Discussion of specific resources, communities, courses, or practices used for continuous learning."
-            },
-            {
-                "question": "Where do you see yourself in 3-5 years?",
-                "ideal_answer": "A response that shows ambition and growth mindset while aligning with potential career paths at the company."
-            }
-        ]
\ No newline at end of file
+        return [dict(qa) for qa in FALLBACK_QUESTIONS]
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import inspect, text
 import os
 
 DB_URL = os.getenv("DB_URL", "sqlite:///./app.db")
@@ -6,7 +7,35 @@ engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
 
 def init_db():
     SQLModel.metadata.create_all(engine)
+    _migrate()
+
+def _literal(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _migrate():
+    # create_all only creates missing tables; columns and indexes added to an
+    # existing model are added here (columns nullable, or with their scalar
+    # default), so an older app.db picks up e.g. the transcript indexes on start
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            have = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in have:
+                    continue
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {col.type.compile(engine.dialect)}'
+                if col.default is not None and col.default.is_scalar:
+                    ddl += f" NOT NULL DEFAULT {_literal(col.default.arg)}"
+                conn.execute(text(ddl))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
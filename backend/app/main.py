@@ -2,8 +2,11 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from .db import init_db
-from .routes import sessions, results
-from .ws import router as ws_router
+from .routes import sessions, results, metrics
+from .ws import router as ws_router, sweep as session_sweep
+from .services import tts, asr, asr_procs, executors, session_prep, evaluation_queue, answer_scoring, write_behind, timers
+from .crew.interview_crew import FIXED_PROMPTS
+import asyncio
 import os
 
 app = FastAPI(title="AI Live Interview")
@@ -23,6 +26,56 @@ app.mount("/static/tts", StaticFiles(directory="data/tts"), name="tts")
 app.include_router(sessions.router)
 app.include_router(results.router)
 app.include_router(ws_router)
+app.include_router(metrics.router)
+
+@app.on_event("startup")
+async def prewarm_tts_cache():
+    # Runs in the background so a slow TTS backend doesn't hold up startup
+    asyncio.create_task(executors.run_io(tts.prewarm, FIXED_PROMPTS))
+
+@app.on_event("startup")
+async def start_write_behind():
+    write_behind.writer.start()
+
+@app.on_event("startup")
+async def start_prep_queue():
+    session_prep.prep_queue.start()
+    await session_prep.recover()
+
+@app.on_event("startup")
+async def start_evaluation_queue():
+    answer_scoring.scoring_queue.start()
+    evaluation_queue.eval_queue.start()
+    # the first pass re-queues evaluations left behind by a previous process
+    app.state.eval_sweep = asyncio.create_task(evaluation_queue.sweep())
+
+@app.on_event("startup")
+async def start_session_sweep():
+    # finishes interviews whose grace-period timer died with a previous process
+    app.state.session_sweep = asyncio.create_task(session_sweep())
+
+@app.on_event("startup")
+async def preload_asr():
+    # Load Whisper now rather than on the first candidate's answer
+    if asr_procs.pool is not None:
+        asyncio.create_task(asr_procs.pool.start_async())
+    elif os.getenv("ASR_PRELOAD", "1") == "1":
+        asyncio.create_task(executors.run_cpu(asr.warmup))
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    # before the db pool goes away
+    await write_behind.writer.stop()
+    await timers.wheel.stop()
+    await session_prep.prep_queue.stop()
+    app.state.eval_sweep.cancel()
+    app.state.session_sweep.cancel()
+    await evaluation_queue.eval_queue.stop()
+    await answer_scoring.scoring_queue.stop()
+    executors.shutdown()
+    tts.pool.close()
+    if asr_procs.pool is not None:
+        asr_procs.pool.shutdown()
 
 @app.get("/")
 def root():
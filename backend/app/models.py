@@ -1,6 +1,7 @@
 from typing import Optional, List
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, UniqueConstraint
 import uuid
 
 class InterviewSession(SQLModel, table=True):
@@ -19,6 +20,7 @@ class InterviewSession(SQLModel, table=True):
     scores: Optional["Evaluation"] = Relationship(back_populates="session")
 
 class QAItem(SQLModel, table=True):
+    __table_args__ = (Index("ix_qaitem_session_order", "session_id", "order_idx"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: str = Field(foreign_key="interviewsession.id")
     question: str
@@ -27,7 +29,33 @@ class QAItem(SQLModel, table=True):
     ts: datetime = Field(default_factory=datetime.utcnow)
     session: InterviewSession = Relationship(back_populates="qas")
 
+class QuestionBank(SQLModel, table=True):
+    # One pool of generated questions per normalized (role, difficulty, domain, JD)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    key: str = Field(index=True, unique=True)
+    role: str
+    difficulty: str
+    domain: Optional[str] = None
+    job_description: Optional[str] = None
+    generations: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+class QuestionBankItem(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    bank_id: int = Field(foreign_key="questionbank.id", index=True)
+    generation: int  # which run_prep call produced it; order_idx is the order within that run
+    question: str
+    ideal_answer: str
+    order_idx: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 class Message(SQLModel, table=True):
+    # transcript reads are per session in time order; build_qas filters on who as well
+    __table_args__ = (
+        Index("ix_message_session_ts", "session_id", "ts"),
+        Index("ix_message_session_who_ts", "session_id", "who", "ts"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: str = Field(foreign_key="interviewsession.id")
     who: str  
@@ -36,6 +64,8 @@ class Message(SQLModel, table=True):
     ts: datetime = Field(default_factory=datetime.utcnow)
 
 class Evaluation(SQLModel, table=True):
+    # find_evaluation: a session's newest row, optionally for one rubric version
+    __table_args__ = (Index("ix_evaluation_session", "session_id", "rubric_version", "id"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: str = Field(foreign_key="interviewsession.id")
     technical: float
@@ -44,5 +74,39 @@ class Evaluation(SQLModel, table=True):
     communication: float
     summary: str
     rubric_json: Optional[str] = None
+    rubric_version: str = Field(default="1")  # a session can have one row per version
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+    session: InterviewSession = Relationship(back_populates="scores")
+
+class EvaluationJob(SQLModel, table=True):
+    # Durable record of a finished session waiting for its Evaluation
+    session_id: str = Field(foreign_key="interviewsession.id", primary_key=True)
+    status: str = Field(default="queued", index=True)  # queued|running|done|failed
+    attempts: int = Field(default=0)
+    expected_scores: int = Field(default=0)  # answered questions that should have an AnswerScore
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class AnswerScore(SQLModel, table=True):
+    # Per-question rubric row, scored in the background while the interview runs
+    __table_args__ = (UniqueConstraint("session_id", "question_idx"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: str = Field(foreign_key="interviewsession.id", index=True)
+    question_idx: int  # position in the interview, 0 being the intro
+    revision: int = Field(default=1)  # bumps when a follow-up extends the answer
+    question: str
+    ideal_answer: str
+    answer: str
+    technical: float
+    communication: float
+    confidence: float
+    feedback: str = ""
+    ts: datetime = Field(default_factory=datetime.utcnow)
 
-    session: InterviewSession = Relationship(back_populates="scores")
\ No newline at end of file
+class InterviewState(SQLModel, table=True):
+    # Live interview progress, so a reconnect can resume on any worker
+    session_id: str = Field(foreign_key="interviewsession.id", primary_key=True)
+    state_json: str
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from .. import ws
+from ..services import (
+    metrics, executors, session_prep, evaluation_queue, answer_scoring, write_behind, timers,
+    asr_batch, tts, llm_cache, speech_prefetch,
+)
+
+router = APIRouter(tags=["metrics"])
+
+_queues = {
+    "prep": session_prep.prep_queue,
+    "evaluation": evaluation_queue.eval_queue,
+    "scoring": answer_scoring.scoring_queue,
+}
+
+metrics.register("interview_live_sockets", "Open interview WebSockets in this process", lambda: ws.live_sockets)
+metrics.register("executor_queue_depth", "Calls waiting for a worker thread", executors.queue_depths, label="pool")
+metrics.register("executor_running", "Calls running on a worker thread",
+                 lambda: {name: p.stats()["running"] for name, p in executors.POOLS.items()}, label="pool")
+metrics.register("job_queue_depth", "Background jobs waiting to run",
+                 lambda: {name: q.queue_depth for name, q in _queues.items()}, label="queue")
+metrics.register("job_running", "Background jobs running",
+                 lambda: {name: q.running for name, q in _queues.items()}, label="queue")
+metrics.register("write_behind_pending", "Transcript rows and session updates not yet committed",
+                 lambda: write_behind.writer.pending)
+metrics.register("asr_batch_queue_depth", "Decode requests waiting for the ASR batcher",
+                 lambda: asr_batch.scheduler.queue_depth)
+metrics.register("timer_wheel_active", "Pending timers on the shared timer wheel", lambda: timers.wheel.active)
+metrics.register("tts_cache_hits_total", "TTS cache hits", lambda: tts.cache.hits, kind="counter")
+metrics.register("tts_cache_misses_total", "TTS cache misses", lambda: tts.cache.misses, kind="counter")
+metrics.register("llm_cache_hits_total", "LLM response cache hits", lambda: llm_cache.cache.hits, kind="counter")
+metrics.register("llm_cache_misses_total", "LLM response cache misses", lambda: llm_cache.cache.misses, kind="counter")
+metrics.register("speech_prefetch_total", "Prompts served from (hits) or missing in (misses) the prefetch "
+                 "buffer, and prefetched clips thrown away", lambda: dict(speech_prefetch.stats),
+                 kind="counter", label="outcome")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    # Prometheus text exposition format 0.0.4
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,27 +1,62 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from ..db import get_session
-from ..models import Evaluation
+from fastapi import APIRouter, Query, Request, Response
+from sqlmodel import Session
+import asyncio
+from ..db import engine
+from ..models import Evaluation, EvaluationJob
 from ..schemas import EvaluationOut
+from ..services import executors, evaluation_queue, evaluator
 
 router = APIRouter(prefix="/results", tags=["results"])
 
+def _evaluation(session_id: str) -> tuple[Evaluation | None, str | None]:
+    # a short session per check: a long poll must not hold a pooled connection
+    with Session(engine) as db:
+        ev = evaluator.find_evaluation(db, session_id)
+        job = db.get(EvaluationJob, session_id)
+        return ev, job.status if job else None
+
+def _etag(ev: Evaluation | None, job_status: str | None) -> str:
+    return f'"ev-{ev.id}"' if ev else f'"pending-{job_status or "none"}"'
+
 @router.get("/{session_id}", response_model=EvaluationOut)
-def get_results(session_id: str, db: Session = Depends(get_session)):
-    ev = db.exec(select(Evaluation).where(Evaluation.session_id==session_id)).first()
+async def get_results(
+    session_id: str,
+    request: Request,
+    response: Response,
+    wait: float = Query(0, ge=0, le=60, description="Long-poll up to this many seconds while evaluation is pending"),
+):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        ev, job_status = await executors.run_db(_evaluation, session_id)
+        remaining = deadline - loop.time()
+        if ev or remaining <= 0:
+            break
+        # woken when this process finishes the job; the DB re-check covers other workers
+        if evaluation_queue.eval_queue.pending(session_id):
+            await evaluation_queue.eval_queue.wait(session_id, min(remaining, 1.0))
+        else:
+            await asyncio.sleep(min(remaining, 1.0))
+
+    etag = _etag(ev, job_status)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
     if not ev:
         return EvaluationOut(
-            technical=0, 
-            strengths="Pending", 
-            confidence=0, 
-            communication=0, 
+            technical=0,
+            strengths="Pending",
+            confidence=0,
+            communication=0,
             summary="Awaiting evaluation"
         )
-    
+
     return EvaluationOut(
-        technical=ev.technical, 
-        strengths=ev.strengths, 
-        confidence=ev.confidence, 
-        communication=ev.communication, 
+        technical=ev.technical,
+        strengths=ev.strengths,
+        confidence=ev.confidence,
+        communication=ev.communication,
         summary=ev.summary
-    )
\ No newline at end of file
+    )
@@ -1,15 +1,17 @@
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from ..db import get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+import asyncio
+from ..db import engine, get_session
 from ..models import InterviewSession, QAItem, Message
 from ..schemas import CreateSessionIn, SessionOut
-from ..crew.prep_crew import run_prep
+from ..services import executors, session_prep, pagination, audio_log
+from ..services.jobs import QueueFull
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
-@router.post("/", response_model=SessionOut)
-def create_session(body: CreateSessionIn, db: Session = Depends(get_session)):
+def _create(db: Session, body: CreateSessionIn) -> tuple[InterviewSession, bool | None]:
     s = InterviewSession(
         role=body.role, 
         difficulty=body.difficulty,
@@ -20,28 +22,121 @@ def create_session(body: CreateSessionIn, db: Session = Depends(get_session)):
     db.add(s)
     db.commit()
     db.refresh(s)
-    
-    qas = run_prep(s.role, s.difficulty, s.domain, s.job_description)
-    for i, qa in enumerate(qas):
-        db.add(QAItem(
-            session_id=s.id, 
-            question=qa["question"], 
-            ideal_answer=qa["ideal_answer"], 
-            order_idx=i
-        ))
-    
-    s.status = "ready"
-    db.add(s)
+    stale = session_prep.prepare_from_bank(db, s)
+    db.refresh(s)
+    return s, stale
+
+def _discard(db: Session, s: InterviewSession):
+    db.delete(s)
     db.commit()
-    
+
+def _busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Too many sessions being prepared, retry shortly",
+                         headers={"Retry-After": str(session_prep.PREP_RETRY_AFTER_SECONDS)})
+
+@router.post("/", response_model=SessionOut)
+async def create_session(body: CreateSessionIn, db: Session = Depends(get_session)):
+    # Questions come from the question bank when these inputs were seen before;
+    # otherwise the prep queue generates them: poll /sessions/{id}/status for `ready`
+    if session_prep.prep_queue.full:
+        raise _busy()
+    s, stale = await executors.run_db(_create, db, body)
+    if stale is None:
+        try:
+            session_prep.enqueue(s.id)
+        except QueueFull:
+            # filled up while the row was being written; don't leave it `preparing` with no job
+            await executors.run_db(_discard, db, s)
+            raise _busy()
+    elif stale:
+        session_prep.enqueue_refresh(s)
     return {"session_id": s.id, "status": s.status}
 
+def _status(session_id: str) -> str | None:
+    # a short session per check: a long poll must not hold a pooled connection
+    with Session(engine) as db:
+        s = db.get(InterviewSession, session_id)
+        return s.status if s else None
+
+@router.get("/{session_id}/status", response_model=SessionOut)
+async def get_session_status(
+    session_id: str,
+    wait: float = Query(0, ge=0, le=60, description="Long-poll up to this many seconds while preparing"),
+):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        status = await executors.run_db(_status, session_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        remaining = deadline - loop.time()
+        if status != "preparing" or remaining <= 0:
+            return {"session_id": session_id, "status": status}
+        # woken as soon as this process finishes the job; the DB re-check
+        # covers jobs run by another worker
+        if session_prep.prep_queue.pending(session_id):
+            await session_prep.prep_queue.wait(session_id, min(remaining, 1.0))
+        else:
+            await asyncio.sleep(min(remaining, 1.0))
+
+_MESSAGE_ORDER = (Message.ts, Message.id)
+_QUESTION_ORDER = (QAItem.order_idx, QAItem.id)
+
+def _page(db: Session, model, where: list, order_by: tuple, after: tuple | None, limit: int):
+    rows = pagination.page(db, model, where, order_by, after, limit + 1)
+    return rows[:limit], len(rows) > limit
+
+async def _list(db: Session, response: Response, model, where: list, order_by: tuple,
+                after: str | None, limit: int | None):
+    """
+    With `limit`, one keyset page plus an X-Next-Cursor header when there is
+    more; without it, everything after the cursor streamed as a JSON array.
+    """
+    after_key = pagination.decode_cursor(after, order_by) if after else None
+    if limit is None:
+        return StreamingResponse(
+            pagination.stream_json(model, where, order_by, after_key), media_type="application/json"
+        )
+    rows, more = await executors.run_db(_page, db, model, where, order_by, after_key, limit)
+    if more:
+        response.headers["X-Next-Cursor"] = pagination.encode_cursor(pagination.sort_key(rows[-1], order_by))
+    return rows
+
 @router.get("/{session_id}/messages")
-def get_session_messages(session_id: str, db: Session = Depends(get_session)):
-    messages = db.exec(select(Message).where(Message.session_id == session_id).order_by(Message.ts)).all()
-    return messages
+async def get_session_messages(
+    session_id: str,
+    response: Response,
+    after: str | None = Query(None, description="Cursor from a previous page's X-Next-Cursor"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size; omit to stream the whole transcript"),
+    db: Session = Depends(get_session),
+):
+    return await _list(db, response, Message, [Message.session_id == session_id], _MESSAGE_ORDER, after, limit)
 
 @router.get("/{session_id}/questions")
-def get_session_questions(session_id: str, db: Session = Depends(get_session)):
-    questions = db.exec(select(QAItem).where(QAItem.session_id == session_id).order_by(QAItem.order_idx)).all()
-    return questions
\ No newline at end of file
+async def get_session_questions(
+    session_id: str,
+    response: Response,
+    after: str | None = Query(None, description="Cursor from a previous page's X-Next-Cursor"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size; omit to stream every question"),
+    db: Session = Depends(get_session),
+):
+    return await _list(db, response, QAItem, [QAItem.session_id == session_id], _QUESTION_ORDER, after, limit)
+
+
+def _audio(session_id: str, start: float, end: float | None) -> bytes | None:
+    reader = audio_log.open_reader(session_id)
+    if reader is None:
+        return None
+    return audio_log.to_wav(reader.read(start, end if end is not None else reader.size / audio_log.BYTES_PER_SECOND))
+
+@router.get("/{session_id}/audio")
+async def get_session_audio(
+    session_id: str,
+    start: float = Query(0, ge=0, description="Seconds into the recorded answer audio"),
+    end: float | None = Query(None, gt=0, description="Seconds into the recorded answer audio; omit for the rest"),
+):
+    # a range is read straight out of the segments (or the archive) with mmap
+    wav = await executors.run_io(_audio, session_id, start, end)
+    if wav is None:
+        raise HTTPException(status_code=404, detail="No audio recorded for this session")
+    return Response(content=wav, media_type="audio/wav")
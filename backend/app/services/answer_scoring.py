@@ -0,0 +1,106 @@
+import os, asyncio, logging
+from sqlmodel import Session, select
+
+from ..db import engine
+from ..models import AnswerScore
+from . import evaluator
+from .jobs import JobQueue, QueueFull
+
+logger = logging.getLogger(__name__)
+
+SCORE_CONCURRENCY = int(os.getenv("SCORE_CONCURRENCY", "4"))
+SCORE_MAX_ATTEMPTS = int(os.getenv("SCORE_MAX_ATTEMPTS", "2"))
+SCORE_MAX_PENDING = int(os.getenv("SCORE_MAX_PENDING", "500"))
+# How long the end of an interview waits for its in-flight scores
+SCORE_WAIT_SECONDS = float(os.getenv("SCORE_WAIT_SECONDS", "10"))
+
+
+def score(session_id: str, question_idx: int, revision: int, role: str, difficulty: str,
+          question: str, ideal_answer: str, answer: str):
+    """Score one answer and upsert its row; an older revision never overwrites a newer one."""
+    result = evaluator.score_answer(question, ideal_answer, answer, role, difficulty)
+    with Session(engine) as db:
+        row = db.exec(
+            select(AnswerScore).where(AnswerScore.session_id == session_id, AnswerScore.question_idx == question_idx)
+        ).first()
+        if row is None:
+            row = AnswerScore(session_id=session_id, question_idx=question_idx,
+                              question=question, ideal_answer=ideal_answer)
+        elif row.revision > revision:
+            return
+        row.revision = revision
+        row.answer = answer
+        row.technical = result["technical"]
+        row.communication = result["communication"]
+        row.confidence = result["confidence"]
+        row.feedback = result["feedback"]
+        db.add(row)
+        db.commit()
+
+
+def scoring_failed(key: str, exc: Exception):
+    # the final evaluation falls back to the whole transcript when answers are missing
+    logger.warning(f"Giving up on scoring {key}")
+
+
+scoring_queue = JobQueue(
+    "scoring", SCORE_CONCURRENCY, max_attempts=SCORE_MAX_ATTEMPTS,
+    max_pending=SCORE_MAX_PENDING, on_failure=scoring_failed,
+)
+
+
+class SessionScorer:
+    """
+    Tracks one live session's answers and queues a scoring job per answer.
+
+    Follow-up answers are appended to the answer to the same question and the
+    combined text is scored again under a new revision.
+    """
+
+    def __init__(self, session_id: str, role: str, difficulty: str, qas: list[dict]):
+        self.session_id = session_id
+        self.role = role
+        self.difficulty = difficulty
+        self.qas = qas
+        self.answers: dict[int, list[str]] = {}
+        self.keys: list[str] = []
+
+    def add(self, question_idx: int, answer: str):
+        if not answer or not 0 <= question_idx < len(self.qas):
+            return
+        parts = self.answers.setdefault(question_idx, [])
+        parts.append(answer)
+        qa = self.qas[question_idx]
+        key = f"{self.session_id}:{question_idx}:{len(parts)}"
+        try:
+            if scoring_queue.submit(key, score, self.session_id, question_idx, len(parts), self.role,
+                                    self.difficulty, qa["question"], qa["ideal_answer"], " ".join(parts)):
+                self.keys.append(key)
+        except QueueFull:
+            logger.warning(f"Scoring queue full, skipping {key}")
+
+    async def drain(self, timeout: float = SCORE_WAIT_SECONDS):
+        """Wait (bounded overall) for this session's scoring jobs to finish."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        for key in self.keys:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or not await scoring_queue.wait(key, remaining):
+                break
+
+
+def scored_answers(db: Session, session_id: str) -> list[dict]:
+    rows = db.exec(
+        select(AnswerScore).where(AnswerScore.session_id == session_id).order_by(AnswerScore.question_idx)
+    ).all()
+    return [
+        {
+            "question": r.question,
+            "candidate_answer": r.answer,
+            "technical": r.technical,
+            "communication": r.communication,
+            "confidence": r.confidence,
+            "feedback": r.feedback,
+        }
+        for r in rows
+    ]
@@ -1,59 +1,212 @@
-from faster_whisper import WhisperModel
-import os, io, wave, logging
+import os, io, time, wave, threading, logging
 import numpy as np
 
+from .metrics import timed
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 _model = None
+# ctranslate2 intra-op threads per decode; 0 lets it pick (all cores)
+ASR_CPU_THREADS = int(os.getenv("ASR_CPU_THREADS", "0"))
+ASR_DEVICE = os.getenv("ASR_DEVICE", "cpu")
+
+def model_config() -> tuple[str, str]:
+    """ASR_MODEL is "size" or "size:compute_type", e.g. "small" or "medium.en:int8_float32"."""
+    size, _, compute_type = os.getenv("ASR_MODEL", "small").partition(":")
+    return size, compute_type or "int8"
+
 
 def get_model():
     global _model
     if _model is None:
-        size = os.getenv("ASR_MODEL", "small")
-        _model = WhisperModel(size, device="cpu", compute_type="int8")
+        # imported here: ctranslate2 is heavy and the web process may never decode
+        # (ASR_PROCESSES > 0 keeps the model in worker processes)
+        from faster_whisper import WhisperModel
+        size, compute_type = model_config()
+        _model = WhisperModel(size, device=ASR_DEVICE, compute_type=compute_type, cpu_threads=ASR_CPU_THREADS)
     return _model
 
 
-def transcribe_chunk(pcm_bytes: bytes, sample_rate: int = 16000) -> str:
+def warmup():
+    """Load the model and run one throwaway decode so the first real answer doesn't pay for it."""
+    started = time.perf_counter()
+    noise = np.random.default_rng(0).normal(0, 0.01, WHISPER_SAMPLE_RATE).astype(np.float32)
+    segments, _ = get_model().transcribe(noise, language="en", beam_size=1)
+    list(segments)
+    logger.info(f"ASR model {model_config()} ready in {time.perf_counter() - started:.1f}s")
+
+
+WHISPER_SAMPLE_RATE = 16000
+VAD_PARAMETERS = dict(min_silence_duration_ms=500, speech_pad_ms=200)
+ASR_BEAM_SIZE = int(os.getenv("ASR_BEAM_SIZE", "5"))
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+_scratch = threading.local()
+
+
+def _scratch_buffer(n: int) -> np.ndarray:
+    # One float32 buffer per worker thread, grown as needed and reused across calls
+    buf = getattr(_scratch, "buf", None)
+    if buf is None or len(buf) < n:
+        buf = _scratch.buf = np.empty(max(n, WHISPER_SAMPLE_RATE * 30), dtype=np.float32)
+    return buf[:n]
+
+
+def pcm_to_float32(pcm: bytes | memoryview | np.ndarray) -> np.ndarray:
     """
-    Transcribe raw PCM16 audio (wrap into WAV in-memory).
+    View PCM16 input as normalized float32 without a container round trip.
+
+    bytes/memoryview are read in place with np.frombuffer; the result lives in a
+    per-thread scratch buffer, so it is only valid until the next call on the
+    same thread. float32 arrays are passed through untouched.
     """
-    if len(pcm_bytes) < 8000:  # ~0.5s @16kHz
-        logger.info(f"Skipping tiny buffer: {len(pcm_bytes)} bytes")
-        return ""
+    if isinstance(pcm, np.ndarray):
+        if pcm.dtype == np.float32:
+            return pcm
+        samples = pcm.astype(np.int16, copy=False).reshape(-1)
+    else:
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+    out = _scratch_buffer(len(samples))
+    np.multiply(samples, _INT16_SCALE, out=out)
+    return out
+
 
-    # Wrap PCM into an in-memory WAV
+def _to_wav(pcm_bytes: bytes, sample_rate: int) -> io.BytesIO:
+    # Wrap PCM into an in-memory WAV (lets faster-whisper resample odd rates)
     wav_io = io.BytesIO()
     with wave.open(wav_io, "wb") as wf:
         wf.setnchannels(1)
         wf.setsampwidth(2)  # 16-bit PCM
         wf.setframerate(sample_rate)
         wf.writeframes(pcm_bytes)
-
     wav_io.seek(0)
+    return wav_io
+
 
+def _num_samples(pcm: bytes | memoryview | np.ndarray) -> int:
+    if isinstance(pcm, np.ndarray):
+        return pcm.size
+    return len(pcm) // 2
+
+
+@timed("asr_transcribe")
+def transcribe_segments(pcm: bytes | memoryview | np.ndarray, sample_rate: int = 16000,
+                        vad_filter: bool = True) -> list[tuple[float, float, str]]:
+    """
+    Transcribe PCM16 audio (bytes, memoryview or an int16/float32 array) into
+    (start_s, end_s, text) segments, with timestamps relative to the buffer.
+    vad_filter=False is for benchmarks (bench/asr_bench.py).
+    """
+    if _num_samples(pcm) < sample_rate // 2:  # ~0.5s
+        logger.info(f"Skipping tiny buffer: {_num_samples(pcm)} samples")
+        return []
+
+    if sample_rate == WHISPER_SAMPLE_RATE:
+        audio = pcm_to_float32(pcm)
+    else:
+        if isinstance(pcm, np.ndarray):
+            if pcm.dtype == np.float32:
+                pcm = np.clip(pcm * 32768, -32768, 32767)
+            pcm = pcm.astype(np.int16, copy=False).tobytes()
+        audio = _to_wav(bytes(pcm), sample_rate)
+
+    # Use VAD filter to detect speech segments
+    segments, _ = get_model().transcribe(
+        audio, 
+        vad_filter=vad_filter, 
+        vad_parameters=VAD_PARAMETERS,
+        language="en"
+    )
+    # consume the generator here: `audio` may be this thread's scratch buffer
+    return [(seg.start, seg.end, seg.text.strip()) for seg in segments if seg.text.strip()]
+
+
+def _split_timestamped(tokens: list[int], tokenizer, offset: float, duration: float, time_precision: float) -> list[tuple[float, float, str]]:
+    # <|t0|> text <|t1|><|t1|> text <|t2|> ... -> [(t0, t1, text), (t1, t2, text)]
+    ts_begin = tokenizer.timestamp_begin
+    segments, current, start = [], [], 0.0
+    for tok in tokens:
+        if tok < ts_begin:
+            current.append(tok)
+            continue
+        ts = (tok - ts_begin) * time_precision
+        if current:
+            text = tokenizer.decode(current).strip()
+            if text:
+                segments.append((offset + start, offset + ts, text))
+            current = []
+        start = ts
+    if current:
+        text = tokenizer.decode(current).strip()
+        if text:
+            segments.append((offset + start, offset + duration, text))
+    return segments
+
+
+def transcribe_batch(clips: list[bytes | memoryview | np.ndarray]) -> list[list[tuple[float, float, str]]]:
+    """
+    Decode several 16 kHz PCM16 clips with one encoder call and one batched
+    generate call, returning transcribe_segments-style results per clip.
+
+    Each clip is first trimmed to its VAD speech span, so silence never reaches
+    the model and clips without speech cost nothing. Clips longer than Whisper's
+    30 s window go through transcribe_segments on their own.
+    """
+    import ctranslate2
+    from faster_whisper.audio import pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    model = get_model()
+    fe = model.feature_extractor
+    results: list[list[tuple[float, float, str]]] = [[] for _ in clips]
+    batch, features, spans = [], [], []
+    for i, pcm in enumerate(clips):
+        n = _num_samples(pcm)
+        if n < WHISPER_SAMPLE_RATE // 2:
+            continue
+        if n > fe.n_samples:
+            results[i] = transcribe_segments(pcm)
+            continue
+        audio = pcm_to_float32(pcm)
+        speech = get_speech_timestamps(audio, VadOptions(**VAD_PARAMETERS))
+        if not speech:
+            continue
+        start, end = speech[0]["start"], speech[-1]["end"]
+        features.append(pad_or_trim(fe(audio[start:end]), fe.nb_max_frames).astype(np.float32))
+        spans.append((start / WHISPER_SAMPLE_RATE, (end - start) / WHISPER_SAMPLE_RATE))
+        batch.append(i)
+
+    if not batch:
+        return results
+
+    tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language="en")
+    encoder_output = model.model.encode(ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack(features))))
+    prompt = model.get_prompt(tokenizer, [])
+    outputs = model.model.generate(
+        encoder_output,
+        [prompt] * len(batch),
+        beam_size=ASR_BEAM_SIZE,
+        max_length=model.max_length,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+        max_initial_timestamp_index=50,
+    )
+    for i, (offset, duration), out in zip(batch, spans, outputs):
+        results[i] = _split_timestamped(out.sequences_ids[0], tokenizer, offset, duration, model.time_precision)
+    return results
+
+
+@timed("transcribe_chunk")
+def transcribe_chunk(pcm: bytes | memoryview | np.ndarray, sample_rate: int = 16000) -> str:
+    """
+    Transcribe raw PCM16 audio (16 kHz input goes straight to Whisper as float32).
+    """
     try:
-        # Use VAD filter to detect speech segments
-        segments, _ = get_model().transcribe(
-            wav_io, 
-            vad_filter=True, 
-            vad_parameters=dict(
-                min_silence_duration_ms=500,
-                speech_pad_ms=200,
-            ),
-            language="en"
-        )
-
-        texts = []
-        for seg in segments:
-            if seg.text.strip():
-                texts.append(seg.text.strip())
-
-        result = " ".join(texts).strip()
+        result = " ".join(text for _, _, text in transcribe_segments(pcm, sample_rate)).strip()
         logger.info(f"Transcribed: '{result}'")
         return result
     except Exception as e:
         logger.error(f"ASR Error: {e}")
-        return ""
\ No newline at end of file
+        return ""
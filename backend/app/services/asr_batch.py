@@ -0,0 +1,141 @@
+import os, time, queue, asyncio, threading, logging
+from concurrent.futures import Future
+
+import numpy as np
+
+from . import asr
+
+logger = logging.getLogger(__name__)
+
+ASR_BATCHING = os.getenv("ASR_BATCHING", "1") == "1"
+ASR_BATCH_MAX = int(os.getenv("ASR_BATCH_MAX", "8"))
+ASR_BATCH_WAIT_MS = float(os.getenv("ASR_BATCH_WAIT_MS", "10"))
+
+# Upper bounds of the batch-size histogram buckets
+_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class _Request:
+    __slots__ = ("audio", "future", "submitted")
+
+    def __init__(self, audio: np.ndarray):
+        self.audio = audio
+        self.future: Future = Future()
+        self.submitted = time.perf_counter()
+
+
+class ASRBatchScheduler:
+    """
+    Collects clips from every live session and decodes them together.
+
+    A single worker thread blocks for the first pending clip, then keeps
+    collecting for up to max_wait_ms (or until max_batch clips) and runs the
+    lot through asr.transcribe_batch. Each caller gets its own result back on
+    its future. Under light load a clip waits at most max_wait_ms; under heavy
+    load batches fill up and throughput rises with the number of speakers.
+    """
+
+    def __init__(self, max_batch: int = ASR_BATCH_MAX, max_wait_ms: float = ASR_BATCH_WAIT_MS, decode=None):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.decode = decode or asr.transcribe_batch
+        self._queue: queue.Queue[_Request] = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.size_histogram = {b: 0 for b in _SIZE_BUCKETS}
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.decode_seconds_total = 0.0
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="asr-batch", daemon=True)
+                self._thread.start()
+
+    def submit(self, pcm: bytes | memoryview | np.ndarray) -> Future:
+        """Queue a 16 kHz PCM16 clip; the future resolves to its segments."""
+        # own the samples: callers may reuse their buffers once this returns
+        if isinstance(pcm, np.ndarray):
+            audio = pcm.copy()
+        else:
+            audio = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2).copy()
+        req = _Request(audio)
+        self._ensure_worker()
+        self._queue.put(req)
+        return req.future
+
+    async def transcribe(self, pcm: bytes | memoryview | np.ndarray) -> list[tuple[float, float, str]]:
+        return await asyncio.wrap_future(self.submit(pcm))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self) -> list[_Request]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                results = self.decode([r.audio for r in batch])
+            except Exception as e:
+                logger.error(f"ASR batch of {len(batch)} failed: {e}")
+                for r in batch:
+                    r.future.set_exception(e)
+            else:
+                for r, segments in zip(batch, results):
+                    r.future.set_result(segments)
+            self._record(batch, started, time.perf_counter())
+
+    def _record(self, batch: list[_Request], started: float, finished: float):
+        waits = [started - r.submitted for r in batch]
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            for b in _SIZE_BUCKETS:
+                if len(batch) <= b:
+                    self.size_histogram[b] += 1
+                    break
+            self.wait_seconds_total += sum(waits)
+            self.wait_seconds_max = max(self.wait_seconds_max, max(waits))
+            self.decode_seconds_total += finished - started
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "queued": self.queue_depth,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_batch_seen,
+                "batch_size_histogram": dict(self.size_histogram),
+                "mean_wait_ms": 1000 * self.wait_seconds_total / self.items if self.items else 0.0,
+                "max_wait_ms": 1000 * self.wait_seconds_max,
+                "mean_decode_ms": 1000 * self.decode_seconds_total / self.batches if self.batches else 0.0,
+            }
+
+
+scheduler = ASRBatchScheduler()
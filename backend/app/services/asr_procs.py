@@ -0,0 +1,103 @@
+import os, asyncio, logging, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import asr
+
+logger = logging.getLogger(__name__)
+
+# 0 keeps decoding in-process; N > 0 runs N worker processes with their own model
+ASR_PROCESSES = int(os.getenv("ASR_PROCESSES", "0"))
+
+
+# --- worker side -----------------------------------------------------------
+
+def _init_worker():
+    # ASR_MODEL (size[:compute_type]) is inherited through the environment
+    logging.basicConfig(level=logging.INFO)
+    asr.warmup()
+
+
+def _ready(_=None) -> int:
+    return os.getpid()
+
+
+def _transcribe_shared(name: str, n_samples: int, sample_rate: int) -> list[tuple[float, float, str]]:
+    # Spawned workers share the parent's resource tracker, so attaching here
+    # doesn't add an owner; the parent's unlink() is the only cleanup needed.
+    shm = shared_memory.SharedMemory(name=name)
+    pcm = np.ndarray((n_samples,), dtype=np.int16, buffer=shm.buf)
+    try:
+        return asr.transcribe_segments(pcm, sample_rate)
+    finally:
+        # drop the view before closing, or close() refuses with exported buffers
+        del pcm
+        shm.close()
+
+
+# --- parent side -----------------------------------------------------------
+
+class ASRProcessPool:
+    """
+    Whisper in separate processes, so decoding uses every core instead of
+    sharing one interpreter's GIL with the web server.
+
+    Every worker loads and warms the model when it starts (start() spawns them
+    all up front). Audio goes through a shared-memory block per call, so only
+    its name crosses the process boundary; the parent frees it once the result
+    is back.
+    """
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor = None
+
+    def start(self):
+        if self._executor is not None:
+            return
+        ctx = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=ctx, initializer=_init_worker
+        )
+        pids = set(self._executor.map(_ready, range(self.processes)))
+        logger.info(f"ASR worker pool ready: {len(pids)} processes, model {asr.model_config()}")
+
+    async def start_async(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.start)
+
+    async def transcribe_segments(self, pcm: bytes | memoryview | np.ndarray, sample_rate: int = 16000) -> list[tuple[float, float, str]]:
+        if self._executor is None:
+            await self.start_async()
+        if isinstance(pcm, np.ndarray):
+            samples = pcm.astype(np.int16, copy=False).reshape(-1)
+        else:
+            samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+        if samples.size < sample_rate // 2:
+            return []
+
+        shm = shared_memory.SharedMemory(create=True, size=samples.nbytes)
+        try:
+            np.ndarray(samples.shape, dtype=np.int16, buffer=shm.buf)[:] = samples
+            future = self._executor.submit(_transcribe_shared, shm.name, samples.size, sample_rate)
+            return await asyncio.wrap_future(future)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def transcribe_chunk(self, pcm: bytes | memoryview | np.ndarray, sample_rate: int = 16000) -> str:
+        try:
+            segments = await self.transcribe_segments(pcm, sample_rate)
+        except Exception as e:
+            logger.error(f"ASR Error: {e}")
+            return ""
+        return " ".join(text for _, _, text in segments).strip()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+pool = ASRProcessPool(ASR_PROCESSES) if ASR_PROCESSES > 0 else None
@@ -0,0 +1,177 @@
+import os, threading, logging
+import numpy as np
+
+from . import asr, asr_batch, asr_procs, executors
+from .metrics import span
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+RING_SECONDS = float(os.getenv("ASR_RING_SECONDS", "60"))
+# A pass runs once this much new audio has arrived
+STEP_SECONDS = float(os.getenv("ASR_STEP_SECONDS", "1.0"))
+# Never decode more than this much audio in one pass
+WINDOW_SECONDS = float(os.getenv("ASR_WINDOW_SECONDS", "15"))
+# Once the uncommitted audio is this long, segments that ended more than
+# KEEP_SECONDS before the live edge are committed and drop out of the window
+COMMIT_AFTER_SECONDS = float(os.getenv("ASR_COMMIT_AFTER_SECONDS", "8"))
+KEEP_SECONDS = float(os.getenv("ASR_KEEP_SECONDS", "2"))
+
+
+class PCMRingBuffer:
+    """
+    Fixed-size ring of int16 samples addressed by absolute sample index
+    (samples written since the last reset). Reads and writes are locked because
+    the socket loop writes while a pool thread reads.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def write(self, pcm: bytes):
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+        with self._lock:
+            if len(samples) > self.capacity:
+                self.total += len(samples) - self.capacity
+                samples = samples[-self.capacity:]
+            pos = self.total % self.capacity
+            first = min(len(samples), self.capacity - pos)
+            self._buf[pos:pos + first] = samples[:first]
+            self._buf[:len(samples) - first] = samples[first:]
+            self.total += len(samples)
+
+    def oldest(self) -> int:
+        return max(0, self.total - self.capacity)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copy samples [start, end); start is clamped to what is still held."""
+        with self._lock:
+            start = max(start, self.oldest())
+            end = min(end, self.total)
+            if end <= start:
+                return np.zeros(0, dtype=np.int16)
+            a, b = start % self.capacity, end % self.capacity
+            if a < b:
+                return self._buf[a:b].copy()
+            return np.concatenate((self._buf[a:], self._buf[:b]))
+
+    def reset(self):
+        with self._lock:
+            self.total = 0
+
+
+async def decode_on_pool(audio: np.ndarray, sample_rate: int) -> list[tuple[float, float, str]]:
+    return await executors.run_cpu(asr.transcribe_segments, audio, sample_rate)
+
+
+async def decode_batched(audio: np.ndarray, sample_rate: int) -> list[tuple[float, float, str]]:
+    if sample_rate != asr.WHISPER_SAMPLE_RATE:
+        return await decode_on_pool(audio, sample_rate)
+    return await asr_batch.scheduler.transcribe(audio)
+
+
+async def decode_in_process(audio: np.ndarray, sample_rate: int) -> list[tuple[float, float, str]]:
+    return await asr_procs.pool.transcribe_segments(audio, sample_rate)
+
+
+_decoder = None
+
+
+def set_decoder(decode):
+    """Decode with `decode(audio, sample_rate)` in every new transcriber (e.g. a fake in load tests); None restores the default."""
+    global _decoder
+    _decoder = decode
+
+
+def default_decoder():
+    if _decoder is not None:
+        return _decoder
+    if asr_procs.pool is not None:
+        return decode_in_process
+    return decode_batched if asr_batch.ASR_BATCHING else decode_on_pool
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of one candidate's answer.
+
+    Each pass decodes only the uncommitted tail of the audio (at most
+    WINDOW_SECONDS), so the cost per pass stays flat however long the answer
+    runs. Text from segments well behind the live edge is committed and never
+    decoded again; the rest is re-decoded on the next pass as more context
+    arrives. feed() is cheap; step() and finish() await `decode`, which by
+    default is the ASR process pool if one is configured and otherwise the
+    cross-session batch scheduler.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, decode=None):
+        self.sample_rate = sample_rate
+        self.decode = decode or default_decoder()
+        self.ring = PCMRingBuffer(int(sample_rate * RING_SECONDS))
+        self.step_samples = int(sample_rate * STEP_SECONDS)
+        self.window_samples = int(sample_rate * WINDOW_SECONDS)
+        self.commit_samples = int(sample_rate * COMMIT_AFTER_SECONDS)
+        self.keep_seconds = KEEP_SECONDS
+        self.reset()
+
+    def reset(self):
+        self.ring.reset()
+        self.committed: list[str] = []
+        self.committed_until = 0
+        self.last_pass_at = 0
+        self.partial = ""
+
+    def feed(self, pcm: bytes):
+        self.ring.write(pcm)
+
+    @property
+    def has_audio(self) -> bool:
+        return self.ring.total > self.committed_until
+
+    def due(self) -> bool:
+        return self.ring.total - self.last_pass_at >= self.step_samples
+
+    async def _decode(self, start: int, end: int) -> tuple[int, list[tuple[float, float, str]]]:
+        start = max(start, self.ring.oldest(), end - self.window_samples)
+        audio = self.ring.read(start, end)
+        try:
+            # queueing included: what the socket waits for, whichever decoder runs it
+            with span("asr_decode"):
+                return start, await self.decode(audio, self.sample_rate)
+        except Exception as e:
+            logger.error(f"ASR Error: {e}")
+            return start, []
+
+    async def step(self) -> str:
+        """Decode the current window and return the running partial transcript."""
+        end = self.ring.total
+        self.last_pass_at = end
+        start, segments = await self._decode(self.committed_until, end)
+
+        tentative = segments
+        if end - start >= self.commit_samples:
+            cutoff = (end - start) / self.sample_rate - self.keep_seconds
+            done = [seg for seg in segments if seg[1] <= cutoff]
+            if done:
+                self.committed.extend(text for _, _, text in done)
+                self.committed_until = start + int(done[-1][1] * self.sample_rate)
+                tentative = segments[len(done):]
+
+        self.partial = " ".join(self.committed + [text for _, _, text in tentative]).strip()
+        return self.partial
+
+    async def finish(self) -> str:
+        """Decode whatever is left, return the full transcript and start over."""
+        end = self.ring.total
+        pos = max(self.committed_until, self.ring.oldest())
+        while pos < end:
+            stop = min(end, pos + self.window_samples)
+            _, segments = await self._decode(pos, stop)
+            self.committed.extend(text for _, _, text in segments)
+            pos = stop
+        text = " ".join(self.committed).strip()
+        self.reset()
+        return text
@@ -0,0 +1,245 @@
+import io, os, mmap, time, wave, bisect, shutil, struct, threading, logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+# Record candidate audio per session (off: nothing is written and audio_path stays empty)
+AUDIO_LOG_ENABLED = os.getenv("AUDIO_LOG", "on") != "off"
+# Segment files roll over at this size; 16 MB is ~8.7 minutes of 16 kHz PCM16
+AUDIO_LOG_SEGMENT_BYTES = int(os.getenv("AUDIO_LOG_SEGMENT_MB", "16")) * 1024 * 1024
+# Appends are buffered in memory and written once this much has built up
+AUDIO_LOG_BUFFER_BYTES = int(os.getenv("AUDIO_LOG_BUFFER_KB", "256")) * 1024
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+# index record: stream byte offset of an appended chunk, wall-clock time it arrived
+INDEX_RECORD = struct.Struct("<Qd")
+
+
+def segment_dir(session_id: str) -> Path:
+    return storage.AUDIO_DIR / session_id
+
+
+def archive_path(session_id: str) -> Path:
+    return storage.AUDIO_DIR / f"{session_id}.wav"
+
+
+def _index_path(directory: Path) -> Path:
+    return directory / "index.bin"
+
+
+def _load_index(path: Path) -> tuple[list[int], list[float]]:
+    offsets, stamps = [], []
+    if path.exists():
+        raw = path.read_bytes()
+        usable = len(raw) - len(raw) % INDEX_RECORD.size  # a torn last record is dropped
+        for offset, ts in INDEX_RECORD.iter_unpack(raw[:usable]):
+            offsets.append(offset)
+            stamps.append(ts)
+    return offsets, stamps
+
+
+def _read_mapped(path: Path, start: int, length: int) -> bytes:
+    if length <= 0:
+        return b""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if start >= size:
+            return b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return m[start:min(size, start + length)]
+
+
+class _Reader(ABC):
+    """Range reads shared by the live log and the compacted archive."""
+
+    offsets: list[int]
+    stamps: list[float]
+    size: int
+
+    @abstractmethod
+    def _pieces(self, start: int, end: int):
+        """(file, position, length) runs covering stream bytes start..end."""
+
+    def read(self, start_s: float, end_s: float) -> bytes:
+        """PCM16 between two points of the recorded audio, in seconds from its start."""
+        start = max(0, int(start_s * SAMPLE_RATE)) * 2
+        end = min(self.size, int(end_s * SAMPLE_RATE) * 2)
+        return b"".join(_read_mapped(path, pos, length) for path, pos, length in self._pieces(start, end))
+
+    def offset_at(self, wall_ts: float) -> int:
+        """Stream byte offset of a wall-clock time (gaps between answers take no audio)."""
+        i = bisect.bisect_right(self.stamps, wall_ts) - 1
+        if i < 0:
+            return 0
+        nxt = self.offsets[i + 1] if i + 1 < len(self.offsets) else self.size
+        offset = self.offsets[i] + int((wall_ts - self.stamps[i]) * SAMPLE_RATE) * 2
+        return min(offset, nxt)
+
+    def read_wall(self, t0: float, t1: float) -> bytes:
+        """PCM16 received between two wall-clock times (time.time() values)."""
+        start, end = self.offset_at(t0), self.offset_at(t1)
+        return self.read(start / BYTES_PER_SECOND, end / BYTES_PER_SECOND)
+
+
+class SegmentLog(_Reader):
+    """
+    Append-only audio log of one session: fixed-size segment files plus a
+    sidecar index of (stream offset, arrival time) per appended chunk.
+
+    append() only copies into a memory buffer (cheap enough for the socket
+    loop); flush() writes the buffer out, splitting it across segment
+    boundaries, and is safe to call from a worker thread. Stream offset N
+    lives in segment N // segment_bytes at N % segment_bytes, so reads are
+    direct mmap slices. Opening an existing log (a resumed session) picks up
+    at its end.
+    """
+
+    def __init__(self, session_id: str, segment_bytes: int = AUDIO_LOG_SEGMENT_BYTES,
+                 buffer_bytes: int = AUDIO_LOG_BUFFER_BYTES):
+        self.session_id = session_id
+        self.directory = segment_dir(session_id)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.buffer_bytes = buffer_bytes
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = bytearray()
+        self._pending_index = bytearray()
+        self.offsets, self.stamps = _load_index(_index_path(self.directory))
+        self.written = self._on_disk()
+        # an index record whose audio never made it to disk is dropped
+        while self.offsets and self.offsets[-1] >= self.written:
+            self.offsets.pop()
+            self.stamps.pop()
+        self.size = self.written
+
+    def _segment(self, n: int) -> Path:
+        return self.directory / f"seg-{n:06d}.pcm"
+
+    def _on_disk(self) -> int:
+        segments = sorted(self.directory.glob("seg-*.pcm"))
+        if not segments:
+            return 0
+        last = int(segments[-1].stem.split("-")[1])
+        return last * self.segment_bytes + segments[-1].stat().st_size
+
+    @property
+    def needs_flush(self) -> bool:
+        return len(self._buffer) >= self.buffer_bytes
+
+    def append(self, pcm: bytes, ts: float | None = None):
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._pending_index += INDEX_RECORD.pack(self.size, ts)
+            self.offsets.append(self.size)
+            self.stamps.append(ts)
+            self._buffer += pcm
+            self.size += len(pcm)
+
+    def flush(self):
+        # appends only wait for the buffer swap, never for the disk
+        with self._flush_lock:
+            with self._lock:
+                data, self._buffer = bytes(self._buffer), bytearray()
+                index, self._pending_index = bytes(self._pending_index), bytearray()
+            pos = self.written
+            view = memoryview(data)
+            while view:
+                seg, within = divmod(pos, self.segment_bytes)
+                take = min(len(view), self.segment_bytes - within)
+                with open(self._segment(seg), "ab") as f:
+                    f.write(view[:take])
+                view = view[take:]
+                pos += take
+            self.written = pos
+            if index:
+                # after the audio: an index record never points past what's on disk
+                with open(_index_path(self.directory), "ab") as f:
+                    f.write(index)
+
+    def _pieces(self, start: int, end: int):
+        # only what has been flushed is on disk
+        end = min(end, self.written)
+        while start < end:
+            seg, within = divmod(start, self.segment_bytes)
+            take = min(end - start, self.segment_bytes - within)
+            yield self._segment(seg), within, take
+            start += take
+
+    def close(self):
+        self.flush()
+
+
+class AudioArchive(_Reader):
+    """A compacted session: one 16 kHz mono WAV plus the index next to it."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with wave.open(str(path), "rb") as wf:
+            self.size = wf.getnframes() * 2
+        with open(path, "rb") as f:
+            header = f.read(4096)
+        self.data_start = header.index(b"data") + 8
+        self.offsets, self.stamps = _load_index(path.with_suffix(".idx"))
+
+    def _pieces(self, start: int, end: int):
+        if start < end:
+            yield self.path, self.data_start + start, end - start
+
+
+def open_log(session_id: str) -> SegmentLog | None:
+    return SegmentLog(session_id) if AUDIO_LOG_ENABLED else None
+
+
+def compact(session_id: str) -> str | None:
+    """
+    Fold a finished session's segments into one archival WAV (streamed
+    segment by segment, never all in memory), keep the index beside it and
+    remove the segments. Returns the archive path, or None with no audio.
+    """
+    directory = segment_dir(session_id)
+    target = archive_path(session_id)
+    if not directory.exists():
+        return str(target) if target.exists() else None
+    segments = sorted(directory.glob("seg-*.pcm"))
+    if not segments:
+        shutil.rmtree(directory, ignore_errors=True)
+        return None
+    tmp = target.with_suffix(".wav.tmp")
+    with wave.open(str(tmp), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        for seg in segments:
+            with open(seg, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    wf.writeframesraw(chunk)
+    index = _index_path(directory)
+    if index.exists():
+        os.replace(index, target.with_suffix(".idx"))
+    os.replace(tmp, target)
+    shutil.rmtree(directory, ignore_errors=True)
+    return str(target)
+
+
+def open_reader(session_id: str) -> _Reader | None:
+    """The session's audio for range reads: the archive once compacted, else the live segments."""
+    if archive_path(session_id).exists():
+        return AudioArchive(archive_path(session_id))
+    if segment_dir(session_id).exists():
+        return SegmentLog(session_id)
+    return None
+
+
+def to_wav(pcm: bytes) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm)
+    return buf.getvalue()
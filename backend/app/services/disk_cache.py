@@ -0,0 +1,116 @@
+import os, uuid, threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class DiskLRU:
+    """
+    Size-bounded store of one file per key in a directory.
+
+    Files are named key + suffix and evicted least recently used first once
+    they add up to more than max_bytes; file mtime records use, so the order
+    survives restarts. encode/decode turn a value into file bytes and back
+    (bytes are stored as is by default). on_evict(keys) is told what was
+    evicted, e.g. to drop an in-memory copy. File IO happens outside the lock.
+    """
+
+    def __init__(self, directory: Path, suffix: str, max_bytes: int, encode=None, decode=None, on_evict=None):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self._encode = encode or (lambda value: value)
+        self._decode = decode or (lambda data: data)
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> size, oldest first
+        self._bytes = 0
+        self._load()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _load(self):
+        entries = []
+        for p in self.directory.glob(f"*{self.suffix}"):
+            st = p.stat()
+            entries.append((st.st_mtime, p.name[:-len(self.suffix)], st.st_size))
+        with self._lock:
+            for _, key, size in sorted(entries):
+                self._entries[key] = size
+                self._bytes += size
+            evicted = self._evict()
+        self._drop(evicted)
+
+    def _evict(self) -> list[str]:
+        evicted = []
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _drop(self, keys: list[str]):
+        for key in keys:
+            try:
+                self.path(key).unlink()
+            except FileNotFoundError:
+                pass
+        if keys and self._on_evict:
+            self._on_evict(keys)
+
+    def forget(self, key: str):
+        """Stop tracking key (its file is gone or no longer wanted)."""
+        with self._lock:
+            self._bytes -= self._entries.pop(key, 0)
+
+    def discard(self, key: str):
+        self.forget(key)
+        self._drop([key])
+
+    def touch(self, key: str) -> bool:
+        """Mark key as just used. False (and forgotten) when it isn't on disk."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.move_to_end(key)
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            # removed behind our back
+            self.forget(key)
+            return False
+        return True
+
+    def get(self, key: str):
+        """The decoded value, or None when it isn't on disk or can't be read back."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self.path(key)
+        try:
+            value = self._decode(path.read_bytes())
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # removed or truncated behind our back
+            self.forget(key)
+            return None
+        return value
+
+    def put(self, key: str, value):
+        data = self._encode(value)
+        path = self.path(key)
+        # write-then-rename so a concurrent reader never sees a partial file
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._bytes += len(data)
+            evicted = self._evict()
+        self._drop(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "disk_bytes": self._bytes}
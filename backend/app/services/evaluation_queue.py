@@ -0,0 +1,152 @@
+import os, asyncio, logging
+from datetime import datetime, timedelta
+from sqlalchemy import update, or_, and_
+from sqlmodel import Session, select
+
+from ..db import engine
+from ..models import InterviewSession, Evaluation, EvaluationJob
+from . import evaluator, executors, answer_scoring
+from .jobs import JobQueue, QueueFull
+
+logger = logging.getLogger(__name__)
+
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "2"))
+EVAL_MAX_ATTEMPTS = int(os.getenv("EVAL_MAX_ATTEMPTS", "3"))
+EVAL_MAX_PENDING = int(os.getenv("EVAL_MAX_PENDING", "500"))
+# How often queued jobs that aren't in this process's queue are picked up
+EVAL_SWEEP_SECONDS = float(os.getenv("EVAL_SWEEP_SECONDS", "30"))
+# A `running` job whose claim is older than this is taken to be abandoned (its worker died)
+EVAL_LEASE_SECONDS = float(os.getenv("EVAL_LEASE_SECONDS", "600"))
+
+
+def add_job(db: Session, session_id: str, expected_scores: int = 0):
+    """Record that session_id needs evaluating (no commit; goes in with the caller's)."""
+    if db.get(EvaluationJob, session_id) is None:
+        db.add(EvaluationJob(session_id=session_id, expected_scores=expected_scores))
+
+
+def _save_evaluation(db: Session, job: EvaluationJob, ev: dict, status: str):
+    if evaluator.find_evaluation(db, job.session_id, evaluator.RUBRIC_VERSION) is None:
+        db.add(Evaluation(
+            session_id=job.session_id,
+            technical=ev["technical"],
+            communication=ev.get("communication", 70),
+            confidence=ev["confidence"],
+            strengths=ev["strengths"],
+            summary=ev["summary"],
+            rubric_json=ev.get("rubric"),
+            rubric_version=evaluator.RUBRIC_VERSION,
+        ))
+    job.status = status
+    job.updated_at = datetime.utcnow()
+    db.add(job)
+    db.commit()
+
+
+def _claimable(now: datetime):
+    return or_(
+        EvaluationJob.status == "queued",
+        and_(EvaluationJob.status == "running",
+             EvaluationJob.updated_at < now - timedelta(seconds=EVAL_LEASE_SECONDS)),
+    )
+
+
+def claim(db: Session, session_id: str) -> bool:
+    """
+    Mark the job running for this worker in one UPDATE. False when it's
+    finished or another worker holds an unexpired claim, so with several
+    uvicorn workers sweeping the same table each job is evaluated once.
+    """
+    now = datetime.utcnow()
+    result = db.execute(
+        update(EvaluationJob)
+        .where(EvaluationJob.session_id == session_id, _claimable(now))
+        .values(status="running", attempts=EvaluationJob.attempts + 1, updated_at=now)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def evaluate_session(session_id: str):
+    """Evaluate a finished session and store the result. Raises on LLM errors so the queue retries."""
+    with Session(engine) as db:
+        if not claim(db, session_id):
+            return
+        job = db.get(EvaluationJob, session_id)
+        s = db.get(InterviewSession, session_id)
+        scored = answer_scoring.scored_answers(db, session_id)
+        try:
+            if scored and len(scored) >= job.expected_scores:
+                ev = evaluator.aggregate_scores(scored, s.role, s.difficulty, s.domain, fallback=False)
+            else:
+                # answers weren't all scored live (e.g. a restart); score the whole transcript
+                ev = evaluator.evaluate_transcript(session_id, s.role, s.difficulty, s.domain, db, fallback=False)
+        except Exception as e:
+            # give the claim back: the retry (here or in another worker's sweep) claims it again
+            job.status = "queued"
+            job.last_error = str(e)[:500]
+            job.updated_at = datetime.utcnow()
+            db.add(job)
+            db.commit()
+            raise
+        _save_evaluation(db, job, ev, "done")
+
+
+def evaluation_failed(session_id: str, exc: Exception):
+    """Out of retries: store the generic fallback evaluation so the results page isn't stuck."""
+    with Session(engine) as db:
+        job = db.get(EvaluationJob, session_id)
+        # running again means another worker claimed it after our last attempt
+        if not job or job.status in ("done", "running"):
+            return
+        _save_evaluation(db, job, evaluator.fallback_evaluation(), "failed")
+
+
+eval_queue = JobQueue(
+    "evaluation", EVAL_CONCURRENCY, max_attempts=EVAL_MAX_ATTEMPTS,
+    max_pending=EVAL_MAX_PENDING, on_failure=evaluation_failed,
+)
+
+
+def enqueue(session_id: str) -> bool:
+    try:
+        return eval_queue.submit(session_id, evaluate_session, session_id)
+    except QueueFull:
+        # the job row stays queued; the next sweep picks it up
+        logger.warning(f"Evaluation queue full, deferring session {session_id}")
+        return False
+
+
+def pending_session_ids() -> list[str]:
+    """Jobs nobody holds: queued, or running under an expired claim."""
+    with Session(engine) as db:
+        return list(db.exec(
+            select(EvaluationJob.session_id)
+            .where(_claimable(datetime.utcnow()))
+            .order_by(EvaluationJob.created_at)
+        ).all())
+
+
+async def recover() -> int:
+    """Queue every claimable job in the DB that isn't already queued here."""
+    ids = await executors.run_db(pending_session_ids)
+    queued = 0
+    for session_id in ids:
+        if eval_queue.pending(session_id):
+            continue
+        if not enqueue(session_id):
+            break
+        queued += 1
+    return queued
+
+
+async def sweep():
+    """Runs for the life of the app: re-queues jobs left by a crash, a restart or a full queue."""
+    while True:
+        try:
+            queued = await recover()
+            if queued:
+                logger.info(f"Queued {queued} pending evaluations")
+        except Exception as e:
+            logger.error(f"Evaluation sweep failed: {e}")
+        await asyncio.sleep(EVAL_SWEEP_SECONDS)
@@ -1,32 +1,43 @@
 import os
 import json
-from crewai import Agent, Crew, Task,LLM
-import google.generativeai as genai
+import logging
+from typing import TYPE_CHECKING
 from sqlmodel import Session, select
 
 from ..models import InterviewSession, QAItem, Message, Evaluation
+from ..crew.llm import get_llm, thread_agent, run_task, llm_available
+from .metrics import timed
 
-os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
+if TYPE_CHECKING:
+    from crewai import Task
+
+logger = logging.getLogger(__name__)
+
+# Stored on every Evaluation; bump when the prompts or scoring change so old rows can be re-run
+RUBRIC_VERSION = os.getenv("RUBRIC_VERSION", "1")
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
-# Initialize Gemini LLM
-llm = LLM(model="gemini/gemini-2.0-flash",temperature=1.0)
+
+def _build_agent():
+    from crewai import Agent
+    return Agent(
+        role="Interview Evaluation Specialist",
+        goal="Evaluate interview transcripts and provide comprehensive scoring and feedback",
+        backstory="""You are an expert at analyzing interview performance, with deep knowledge 
+        of hiring practices across various industries. You can accurately assess technical knowledge, 
+        communication skills, confidence levels, and provide constructive feedback that helps 
+        candidates understand their strengths and areas for improvement.""",
+        verbose=True,
+        allow_delegation=False,
+        llm=get_llm(temperature=1.0)
+    )
 
 class EvaluationAgent:
     def __init__(self):
-        self.agent = Agent(
-            role="Interview Evaluation Specialist",
-            goal="Evaluate interview transcripts and provide comprehensive scoring and feedback",
-            backstory="""You are an expert at analyzing interview performance, with deep knowledge 
-            of hiring practices across various industries. You can accurately assess technical knowledge, 
-            communication skills, confidence levels, and provide constructive feedback that helps 
-            candidates understand their strengths and areas for improvement.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=llm
-        )
-    
+        # built once per thread; the LLM behind it is shared
+        self.agent = thread_agent("evaluation", _build_agent)
 
-    def create_evaluation_task(self, qas: list[dict], role: str, difficulty: str, domain: str) -> Task:
+    def create_evaluation_task(self, qas: list[dict], role: str, difficulty: str, domain: str) -> "Task":
+        from crewai import Task
         return Task(
             description=f"""Evaluate this interview for a {role} position at {difficulty} level.
             Domain: {domain or "Not specified"}
@@ -49,6 +60,82 @@ class EvaluationAgent:
             async_execution=False
         )
 
+    def create_answer_task(self, question: str, ideal_answer: str, answer: str, role: str, difficulty: str) -> "Task":
+        from crewai import Task
+        return Task(
+            description=f"""Score one answer from an interview for a {role} position at {difficulty} level.
+
+            Question: {question}
+            Ideal answer: {ideal_answer}
+            Candidate answer: {answer}
+
+            Score the candidate answer against the ideal answer:
+            technical (0-100), communication (0-100), confidence (0-100),
+            and one or two sentences of feedback.
+
+            Format your response as valid JSON with these exact keys:
+            technical, communication, confidence, feedback""",
+            agent=self.agent,
+            expected_output="A valid JSON object with the answer's scores",
+            async_execution=False
+        )
+
+    def create_summary_task(self, scored: list[dict], role: str, difficulty: str, domain: str) -> "Task":
+        from crewai import Task
+        return Task(
+            description=f"""Summarize this interview for a {role} position at {difficulty} level.
+            Domain: {domain or "Not specified"}
+
+            Each answer has already been scored:
+            {json.dumps(scored, indent=2)}
+
+            Write the candidate's key strengths and a short overall summary.
+            Format your response as valid JSON with these exact keys:
+            strengths, summary""",
+            agent=self.agent,
+            expected_output="A valid JSON object with strengths and summary",
+            async_execution=False
+        )
+
+def _run_json(agent: EvaluationAgent, task: "Task", validate, kickoff=None, version: str = RUBRIC_VERSION) -> dict:
+    # cached per rubric version, so a new version (RUBRIC_VERSION or batch_eval --version) re-runs everything
+    return run_task(agent.agent, task, validate, temperature=1.0, namespace=version, kickoff=kickoff)
+
+def _validate_evaluation(data) -> dict:
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    # Convert lists to strings for database storage
+    if isinstance(data.get("strengths"), list):
+        data["strengths"] = ", ".join(data["strengths"])
+    if isinstance(data.get("rubric"), (dict, list)):
+        data["rubric"] = json.dumps(data["rubric"])
+    # Ensure all required fields are present
+    required_fields = ["technical", "communication", "confidence", "strengths", "summary", "rubric"]
+    for field in required_fields:
+        if field not in data:
+            raise ValueError(f"Missing required field: {field}")
+    return data
+
+def _validate_answer_score(data) -> dict:
+    for field in ("technical", "communication", "confidence"):
+        data[field] = float(data[field])
+    data["feedback"] = str(data.get("feedback", ""))
+    return data
+
+def _validate_summary(data) -> dict:
+    strengths = data["strengths"]
+    return {
+        "strengths": ", ".join(strengths) if isinstance(strengths, list) else str(strengths),
+        "summary": str(data["summary"]),
+    }
+
+def find_evaluation(db: Session, session_id: str, version: str | None = None) -> Evaluation | None:
+    """The session's evaluation for `version`, or its newest one."""
+    q = select(Evaluation).where(Evaluation.session_id == session_id)
+    if version is not None:
+        q = q.where(Evaluation.rubric_version == version)
+    return db.exec(q.order_by(Evaluation.id.desc())).first()
+
 def build_qas(session_id: str, db: Session) -> list[dict]:
         qas = db.exec(
             select(QAItem).where(QAItem.session_id == session_id).order_by(QAItem.order_idx)
@@ -68,9 +155,14 @@ def build_qas(session_id: str, db: Session) -> list[dict]:
             })
         return qas_structured
 
-def evaluate_transcript(session_id: str, role: str, difficulty: str, domain: str|None,db:Session) -> dict:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+@timed("evaluate_transcript")
+def evaluate_transcript(session_id: str, role: str, difficulty: str, domain: str|None,db:Session, fallback: bool = True,
+                        kickoff=None) -> dict:
+    """
+    Score a whole transcript in one LLM call. `kickoff(crew) -> str` replaces
+    crew.kickoff(), e.g. with a stub for offline runs and benchmarks.
+    """
+    if not llm_available() and kickoff is None:
         # fallback naive heuristic if no key provided
         import random
         return {
@@ -83,57 +175,80 @@ def evaluate_transcript(session_id: str, role: str, difficulty: str, domain: str
         }
 
     qas_structured = build_qas(session_id, db)
+    return evaluate_qas(qas_structured, role, difficulty, domain, fallback, kickoff)
+
+def evaluate_qas(qas_structured: list[dict], role: str, difficulty: str, domain: str|None, fallback: bool = True,
+                 kickoff=None, version: str = RUBRIC_VERSION) -> dict:
+    """`version` is the rubric version the result is stored under; it keys the LLM cache."""
     # Create the evaluation agent and task
     evaluation_agent = EvaluationAgent()
     task = evaluation_agent.create_evaluation_task(qas_structured, role, difficulty, domain)
     
     try:
-        # Execute the evaluation task
-        crew = Crew(
-            agents=[evaluation_agent.agent],
-            tasks=[task],
-            verbose=True
-        )
-        result = crew.kickoff()
-        text = str(result)
-        
-        # Clean the response (remove markdown code blocks if present)
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-        text = text.strip()
-        
-        # Parse the JSON response
-        evaluation_data = json.loads(text)
-         # Convert lists to strings for database storage
-        if isinstance(evaluation_data.get("strengths"), list):
-            evaluation_data["strengths"] = ", ".join(evaluation_data["strengths"])
+        # Execute the evaluation task (parsed and validated, or from the LLM cache)
+        return _run_json(evaluation_agent, task, _validate_evaluation, kickoff, version)
         
-        if isinstance(evaluation_data.get("rubric"), (dict, list)):
-            evaluation_data["rubric"] = json.dumps(evaluation_data["rubric"])
-        
-        # Ensure all required fields are present
-        required_fields = ["technical", "communication", "confidence", "strengths", "summary", "rubric"]
-        for field in required_fields:
-            if field not in evaluation_data:
-                raise ValueError(f"Missing required field: {field}")
-                
-        return evaluation_data
-        
-    except Exception as e:
-        print(f"Error in evaluation: {e}")
-        # Fallback evaluation
-        return {
-            "technical": 70, 
-            "communication": 70, 
-            "confidence": 70,
-            "strengths": "Clear communication and good foundational knowledge.",
-            "summary": "Solid overall performance with potential for growth in specific areas.",
-            "rubric": json.dumps({
-                "technical": "Assessed based on relevance and depth of technical responses",
-                "communication": "Evaluated clarity, structure, and effectiveness of communication",
-                "confidence": "Measured by assertiveness and conviction in responses",
-                "note": "fallback evaluation due to processing error"
-            })
-        }
\ No newline at end of file
+    except Exception:
+        logger.exception("Error in evaluation")
+        if not fallback:
+            raise
+        return fallback_evaluation()
+
+
+def fallback_evaluation() -> dict:
+    return {
+        "technical": 70,
+        "communication": 70,
+        "confidence": 70,
+        "strengths": "Clear communication and good foundational knowledge.",
+        "summary": "Solid overall performance with potential for growth in specific areas.",
+        "rubric": json.dumps({
+            "technical": "Assessed based on relevance and depth of technical responses",
+            "communication": "Evaluated clarity, structure, and effectiveness of communication",
+            "confidence": "Measured by assertiveness and conviction in responses",
+            "note": "fallback evaluation due to processing error"
+        })
+    }
+
+
+def score_answer(question: str, ideal_answer: str, answer: str, role: str, difficulty: str) -> dict:
+    """Scores for a single answer; raises on LLM or parse errors."""
+    if not llm_available():
+        words = len(answer.split())
+        score = min(85, 50 + words)
+        return {"technical": score, "communication": score, "confidence": score,
+                "feedback": "Heuristic score based on answer length."}
+
+    agent = EvaluationAgent()
+    return _run_json(agent, agent.create_answer_task(question, ideal_answer, answer, role, difficulty),
+                     _validate_answer_score)
+
+
+def aggregate_scores(scored: list[dict], role: str, difficulty: str, domain: str|None, fallback: bool = True) -> dict:
+    """
+    Final evaluation from per-answer scores: the averages plus one short
+    summary call over the scores and feedback, not the whole transcript.
+    """
+    result = {
+        field: round(sum(s[field] for s in scored) / len(scored), 1)
+        for field in ("technical", "communication", "confidence")
+    }
+    result["rubric"] = json.dumps(scored)
+
+    if not llm_available():
+        result["strengths"] = "Shows good grasp of fundamentals; answers structured."
+        result["summary"] = "Overall competent performance with room for deeper examples."
+        return result
+
+    try:
+        agent = EvaluationAgent()
+        result.update(_run_json(agent, agent.create_summary_task(scored, role, difficulty, domain),
+                                _validate_summary))
+    except Exception:
+        logger.exception("Error in evaluation summary")
+        if not fallback:
+            raise
+        fb = fallback_evaluation()
+        result["strengths"] = fb["strengths"]
+        result["summary"] = fb["summary"]
+    return result
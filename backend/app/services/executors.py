@@ -0,0 +1,125 @@
+import asyncio, os, threading, functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking work is split by what it waits on, so a burst of slow TTS/LLM calls
+# can't starve ASR decoding or the DB writes that the socket loop awaits.
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", "32"))
+IO_POOL_QUEUE = int(os.getenv("IO_POOL_QUEUE", "512"))
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(os.cpu_count() or 2)))
+CPU_POOL_QUEUE = int(os.getenv("CPU_POOL_QUEUE", "128"))
+DB_POOL_WORKERS = int(os.getenv("DB_POOL_WORKERS", "4"))
+DB_POOL_QUEUE = int(os.getenv("DB_POOL_QUEUE", "1024"))
+
+
+class _Call:
+    __slots__ = ("started", "abandoned")
+
+    def __init__(self):
+        self.started = False
+        self.abandoned = False
+
+
+class WorkPool:
+    """
+    Bounded thread pool with an async front end.
+
+    At most max_workers calls run at once and at most max_pending more sit in
+    the executor queue; further callers wait on the event loop (not a thread)
+    until a slot frees up. queue_depth counts everything submitted but not yet
+    running, including callers still waiting for a slot.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop = None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    def _invoke(self, call: _Call, fn):
+        with self._lock:
+            if call.abandoned:
+                return None
+            call.started = True
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    async def run(self, fn, *args, **kwargs):
+        call = _Call()
+        with self._lock:
+            self._queued += 1
+        try:
+            async with self._get_slots():
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self._executor, self._invoke, call, functools.partial(fn, *args, **kwargs)
+                )
+        finally:
+            with self._lock:
+                if not call.started:
+                    # cancelled before a worker picked it up
+                    call.abandoned = True
+                    self._queued -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return self._queued
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+io_pool = WorkPool("io", IO_POOL_WORKERS, IO_POOL_QUEUE)      # Google TTS, Gemini/CrewAI
+cpu_pool = WorkPool("cpu", CPU_POOL_WORKERS, CPU_POOL_QUEUE)  # Whisper decoding
+db_pool = WorkPool("db", DB_POOL_WORKERS, DB_POOL_QUEUE)      # SQLModel queries/commits
+
+POOLS = {p.name: p for p in (io_pool, cpu_pool, db_pool)}
+
+
+async def run_io(fn, *args, **kwargs):
+    return await io_pool.run(fn, *args, **kwargs)
+
+async def run_cpu(fn, *args, **kwargs):
+    return await cpu_pool.run(fn, *args, **kwargs)
+
+async def run_db(fn, *args, **kwargs):
+    return await db_pool.run(fn, *args, **kwargs)
+
+
+def queue_depths() -> dict:
+    return {name: p.queue_depth for name, p in POOLS.items()}
+
+def stats() -> dict:
+    return {name: p.stats() for name, p in POOLS.items()}
+
+def shutdown():
+    for p in POOLS.values():
+        p.shutdown()
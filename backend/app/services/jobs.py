@@ -0,0 +1,129 @@
+import asyncio, logging
+
+from . import executors
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Background jobs on the event loop with bounded concurrency and retries.
+
+    A job is a blocking function run on the io pool. At most `concurrency`
+    run at once and at most `max_pending` wait; submit() raises QueueFull
+    beyond that so callers can shed load instead of piling up threads. A
+    failed attempt is retried after backoff * 2**(attempt-1) seconds without
+    holding a worker; after max_attempts, on_failure(key, exc) is called (on
+    the io pool as well). Jobs are keyed so the same key is never queued twice
+    and callers can wait() for it to finish.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_attempts: int = 3,
+                 backoff: float = 2.0, max_pending: int = 1000, on_failure=None):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_pending = max_pending
+        self.on_failure = on_failure
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._events: dict[str, asyncio.Event] = {}
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def full(self) -> bool:
+        """submit() of a new key would raise QueueFull (running and backing-off jobs count too)."""
+        return len(self._events) >= self.max_pending + self.concurrency
+
+    def pending(self, key: str) -> bool:
+        return key in self._events
+
+    def submit(self, key: str, fn, *args) -> bool:
+        """Queue fn(*args) under key. Returns False if that key is already queued or running."""
+        if key in self._events:
+            return False
+        if self._queue is None:
+            self.start()
+        if self.full:
+            raise QueueFull(self.name)
+        self._events[key] = asyncio.Event()
+        self._queue.put_nowait((key, fn, args, 1))
+        return True
+
+    async def wait(self, key: str, timeout: float) -> bool:
+        """Wait for key's job to finish here; True if it isn't (or is no longer) pending."""
+        ev = self._events.get(key)
+        if ev is None:
+            return True
+        try:
+            await asyncio.wait_for(ev.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _finish(self, key: str):
+        ev = self._events.pop(key, None)
+        if ev is not None:
+            ev.set()
+
+    async def _worker(self):
+        while True:
+            key, fn, args, attempt = await self._queue.get()
+            self.running += 1
+            try:
+                await executors.run_io(fn, *args)
+                self.succeeded += 1
+                self._finish(key)
+            except Exception as e:
+                if attempt < self.max_attempts:
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    logger.warning(f"{self.name} job {key} failed (attempt {attempt}): {e}; retrying in {delay:.1f}s")
+                    self.retried += 1
+                    asyncio.get_running_loop().call_later(
+                        delay, self._queue.put_nowait, (key, fn, args, attempt + 1)
+                    )
+                else:
+                    logger.error(f"{self.name} job {key} failed after {attempt} attempts: {e}")
+                    self.failed += 1
+                    if self.on_failure:
+                        try:
+                            await executors.run_io(self.on_failure, key, e)
+                        except Exception as e2:
+                            logger.error(f"{self.name} failure handler for {key} raised: {e2}")
+                    self._finish(key)
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue_depth,
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
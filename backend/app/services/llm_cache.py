@@ -0,0 +1,71 @@
+import os, re, json, time, hashlib, threading, logging
+
+from . import storage
+from .disk_cache import DiskLRU
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "on") != "off"
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    # the prompts are indented f-strings; layout differences shouldn't miss the cache
+    return _WS.sub(" ", prompt).strip()
+
+
+def cache_key(model: str, temperature: float, prompt: str, namespace: str = "") -> str:
+    raw = json.dumps([namespace, model, float(temperature), normalize_prompt(prompt)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Parsed LLM responses on disk, one JSON file per key in storage.LLM_CACHE_DIR.
+
+    Only values that already passed the caller's parse/validate step are
+    stored, so a hit is returned as is. Entries expire after ttl seconds;
+    the directory is LRU-evicted down to max_bytes by DiskLRU.
+    """
+
+    def __init__(self, directory, max_bytes: int, ttl: float, enabled: bool = True):
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        self.disk = DiskLRU(directory, ".json", max_bytes,
+                            encode=lambda entry: json.dumps(entry).encode("utf-8"), decode=json.loads)
+
+    def get(self, key: str):
+        """The cached value, or None on a miss or an expired entry."""
+        if not self.enabled:
+            return None
+        entry = self.disk.get(key)
+        if entry is not None and time.time() - entry["created"] > self.ttl:
+            self.disk.discard(key)
+            with self._lock:
+                self.expired += 1
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry["value"]
+
+    def put(self, key: str, value):
+        if self.enabled:
+            self.disk.put(key, {"created": time.time(), "value": value})
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {"hits": self.hits, "misses": self.misses, "expired": self.expired}
+        return {**counts, **self.disk.stats()}
+
+
+cache = LLMCache(storage.LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES, LLM_CACHE_TTL_HOURS * 3600, LLM_CACHE_ENABLED)
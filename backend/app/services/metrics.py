@@ -0,0 +1,117 @@
+import os, time, bisect, threading, functools, logging
+
+logger = logging.getLogger(__name__)
+
+# METRICS=off skips recording (spans become a clock read and nothing else)
+METRICS_ENABLED = os.getenv("METRICS", "on") != "off"
+# Seconds: a fast SQLite commit at the bottom, a slow LLM call at the top
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with one series per label value.
+
+    observe() is a bisect plus three additions under a lock; buckets are
+    stored per bucket and only made cumulative when rendered.
+    """
+
+    def __init__(self, name: str, help: str, label: str, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: dict[str, list] = {}  # label value -> [per-bucket counts (+Inf last), sum]
+
+    def observe(self, value: str, seconds: float):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(value)
+            if series is None:
+                series = self._series[value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += seconds
+
+    def snapshot(self) -> dict[str, tuple[list[int], float]]:
+        with self._lock:
+            return {value: (list(counts), total) for value, (counts, total) in self._series.items()}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, (counts, total) in sorted(self.snapshot().items()):
+            label = f'{self.label}="{_escape(value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound:g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+stage_seconds = Histogram("interview_stage_seconds", "Wall time per pipeline stage", "stage")
+
+
+class Span:
+    """`with span("stage"):` records the block's wall time (awaits included) under stage."""
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if METRICS_ENABLED:
+            stage_seconds.observe(self.stage, time.perf_counter() - self.t0)
+        return False
+
+
+def span(stage: str) -> Span:
+    return Span(stage)
+
+
+def timed(stage: str):
+    """Decorator form of span() for plain functions."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with Span(stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# Gauges and counters are read when /metrics is scraped, not kept up to date on the hot path
+_collectors: list[tuple[str, str, str, str | None, object]] = []
+
+
+def register(name: str, help: str, fn, kind: str = "gauge", label: str | None = None):
+    """fn() returns a number, or {label value: number} when label is given."""
+    _collectors.append((name, help, kind, label, fn))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render() -> str:
+    lines = stage_seconds.render()
+    for name, help, kind, label, fn in _collectors:
+        try:
+            value = fn()
+        except Exception as e:
+            logger.warning(f"Metric {name} failed: {e}")
+            continue
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        if label is None:
+            lines.append(f"{name} {value:g}")
+        else:
+            for key, v in sorted(value.items()):
+                lines.append(f'{name}{{{label}="{_escape(key)}"}} {v:g}')
+    return "\n".join(lines) + "\n"
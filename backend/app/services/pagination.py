@@ -0,0 +1,68 @@
+import json, base64
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
+
+from ..db import engine
+from . import executors
+
+STREAM_PAGE_SIZE = 500
+
+
+def encode_cursor(values: tuple) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: tuple) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(order_by):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(v) if col.type.python_type is datetime else v
+            for col, v in zip(order_by, values)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page(db: Session, model, where: list, order_by: tuple, after: tuple | None, limit: int) -> list:
+    """
+    One page of rows ordered by `order_by` (which must end in a unique column),
+    starting after the row whose sort key is `after`. A keyset seek on the
+    composite index, so deep pages cost the same as the first.
+    """
+    q = select(model).where(*where)
+    if after is not None:
+        q = q.where(tuple_(*order_by) > tuple_(*after))
+    return list(db.exec(q.order_by(*order_by).limit(limit)).all())
+
+
+def sort_key(row, order_by: tuple) -> tuple:
+    return tuple(getattr(row, col.key) for col in order_by)
+
+
+def _page_in_new_session(model, where, order_by, after, limit):
+    # the request's session is gone by the time a streamed body is read
+    with Session(engine) as db:
+        rows = page(db, model, where, order_by, after, limit)
+        return [jsonable_encoder(r) for r in rows], (sort_key(rows[-1], order_by) if rows else None)
+
+
+async def stream_json(model, where: list, order_by: tuple, after: tuple | None = None):
+    """Yield every matching row as one JSON array, fetched a page at a time on the db pool."""
+    yield b"["
+    first = True
+    while True:
+        rows, last = await executors.run_db(_page_in_new_session, model, where, order_by, after, STREAM_PAGE_SIZE)
+        for row in rows:
+            yield (b"" if first else b",") + json.dumps(row).encode()
+            first = False
+        if len(rows) < STREAM_PAGE_SIZE:
+            break
+        after = last
+    yield b"]"
@@ -0,0 +1,98 @@
+import os, json, random, hashlib, logging
+from datetime import datetime, timedelta
+from sqlmodel import Session, select, delete
+
+from ..models import QuestionBank, QuestionBankItem
+
+logger = logging.getLogger(__name__)
+
+# off    - always call run_prep
+# exact  - reuse the most recent generated set as is
+# sample - draw a fresh subset from every question generated for this key so far
+QUESTION_BANK_POLICY = os.getenv("QUESTION_BANK_POLICY", "exact")
+# After this long a bank is still served but regenerated in the background
+QUESTION_BANK_TTL_HOURS = float(os.getenv("QUESTION_BANK_TTL_HOURS", "168"))
+QUESTION_BANK_SAMPLE_SIZE = int(os.getenv("QUESTION_BANK_SAMPLE_SIZE", "8"))
+# Oldest generations are dropped once a pool holds more items than this
+QUESTION_BANK_MAX_POOL = int(os.getenv("QUESTION_BANK_MAX_POOL", "60"))
+
+
+def _norm(value: str | None) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def bank_key(role: str, difficulty: str, domain: str | None, jd: str | None) -> str:
+    raw = json.dumps([_norm(role), _norm(difficulty), _norm(domain), _norm(jd)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _get_bank(db: Session, key: str) -> QuestionBank | None:
+    return db.exec(select(QuestionBank).where(QuestionBank.key == key)).first()
+
+
+def is_stale(bank: QuestionBank) -> bool:
+    return datetime.utcnow() - bank.refreshed_at > timedelta(hours=QUESTION_BANK_TTL_HOURS)
+
+
+def lookup(db: Session, role: str, difficulty: str, domain: str | None, jd: str | None,
+           policy: str = QUESTION_BANK_POLICY) -> tuple[list[dict] | None, bool]:
+    """
+    Questions for these inputs from the bank, per `policy`.
+    Returns (qas, stale); qas is None on a miss or when the policy is off.
+    """
+    if policy == "off":
+        return None, False
+    bank = _get_bank(db, bank_key(role, difficulty, domain, jd))
+    if bank is None or bank.generations == 0:
+        return None, False
+
+    if policy == "sample":
+        items = db.exec(
+            select(QuestionBankItem).where(QuestionBankItem.bank_id == bank.id)
+        ).all()
+        pool = list({it.question: it for it in items}.values())
+        items = random.sample(pool, min(QUESTION_BANK_SAMPLE_SIZE, len(pool)))
+    else:
+        items = db.exec(
+            select(QuestionBankItem)
+            .where(QuestionBankItem.bank_id == bank.id, QuestionBankItem.generation == bank.generations)
+            .order_by(QuestionBankItem.order_idx)
+        ).all()
+
+    if not items:
+        return None, False
+    return [{"question": it.question, "ideal_answer": it.ideal_answer} for it in items], is_stale(bank)
+
+
+def store(db: Session, role: str, difficulty: str, domain: str | None, jd: str | None, qas: list[dict]):
+    """Add a freshly generated set to the bank for these inputs (commits)."""
+    key = bank_key(role, difficulty, domain, jd)
+    bank = _get_bank(db, key)
+    if bank is None:
+        bank = QuestionBank(key=key, role=role, difficulty=difficulty, domain=domain, job_description=jd)
+        db.add(bank)
+        db.flush()
+    bank.generations += 1
+    bank.refreshed_at = datetime.utcnow()
+    for i, qa in enumerate(qas):
+        db.add(QuestionBankItem(
+            bank_id=bank.id,
+            generation=bank.generations,
+            question=qa["question"],
+            ideal_answer=qa["ideal_answer"],
+            order_idx=i,
+        ))
+    db.add(bank)
+    db.flush()
+    _trim(db, bank)
+    db.commit()
+
+
+def _trim(db: Session, bank: QuestionBank):
+    ids = db.exec(
+        select(QuestionBankItem.id)
+        .where(QuestionBankItem.bank_id == bank.id)
+        .order_by(QuestionBankItem.generation.desc(), QuestionBankItem.order_idx)
+    ).all()
+    if len(ids) > QUESTION_BANK_MAX_POOL:
+        db.exec(delete(QuestionBankItem).where(QuestionBankItem.id.in_(ids[QUESTION_BANK_MAX_POOL:])))
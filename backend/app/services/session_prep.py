@@ -0,0 +1,124 @@
+import os, logging
+from sqlmodel import Session, select
+
+from ..db import engine
+from ..models import InterviewSession, QAItem
+from ..crew.prep_crew import run_prep, FALLBACK_QUESTIONS
+from . import executors, question_bank
+from .jobs import JobQueue, QueueFull
+
+logger = logging.getLogger(__name__)
+
+PREP_CONCURRENCY = int(os.getenv("PREP_CONCURRENCY", "4"))
+PREP_MAX_ATTEMPTS = int(os.getenv("PREP_MAX_ATTEMPTS", "3"))
+PREP_MAX_PENDING = int(os.getenv("PREP_MAX_PENDING", "200"))
+# Retry-After sent with the 503 when the prep queue is full
+PREP_RETRY_AFTER_SECONDS = int(os.getenv("PREP_RETRY_AFTER_SECONDS", "5"))
+
+
+def _save_questions(db: Session, s: InterviewSession, qas: list[dict]):
+    # a retried job may have written some rows already
+    for old in db.exec(select(QAItem).where(QAItem.session_id == s.id)).all():
+        db.delete(old)
+    for i, qa in enumerate(qas):
+        db.add(QAItem(
+            session_id=s.id,
+            question=qa["question"],
+            ideal_answer=qa["ideal_answer"],
+            order_idx=i
+        ))
+    s.status = "ready"
+    db.add(s)
+    db.commit()
+
+
+def prepare_session(session_id: str):
+    """Generate questions for a `preparing` session and mark it ready. Raises on LLM errors so the queue retries."""
+    with Session(engine) as db:
+        s = db.get(InterviewSession, session_id)
+        if not s or s.status != "preparing":
+            return
+        qas = run_prep(s.role, s.difficulty, s.domain, s.job_description, fallback=False)
+        _save_questions(db, s, qas)
+        try:
+            question_bank.store(db, s.role, s.difficulty, s.domain, s.job_description, qas)
+        except Exception as e:
+            # the session is already ready; a missed bank write only costs a future cache hit
+            logger.warning(f"Could not store questions for session {session_id} in the bank: {e}")
+            db.rollback()
+
+
+def refresh_bank(role: str, difficulty: str, domain: str | None, jd: str | None):
+    """Regenerate a stale question bank entry. Raises on LLM errors so the queue retries."""
+    # a fresh generation, not the cached response that filled the entry last time
+    qas = run_prep(role, difficulty, domain, jd, fallback=False, use_cache=False)
+    with Session(engine) as db:
+        question_bank.store(db, role, difficulty, domain, jd, qas)
+
+
+def prepare_failed(session_id: str, exc: Exception):
+    """Out of retries: fall back to the generic questions, or mark the session failed if even that fails."""
+    if session_id.startswith("bank:"):
+        # a failed refresh keeps serving the stale entry
+        return
+    with Session(engine) as db:
+        s = db.get(InterviewSession, session_id)
+        if not s or s.status != "preparing":
+            return
+        try:
+            _save_questions(db, s, [dict(qa) for qa in FALLBACK_QUESTIONS])
+        except Exception as e:
+            logger.error(f"Could not prepare session {session_id}: {e}")
+            db.rollback()
+            s = db.get(InterviewSession, session_id)
+            s.status = "failed"
+            db.add(s)
+            db.commit()
+
+
+prep_queue = JobQueue(
+    "prep", PREP_CONCURRENCY, max_attempts=PREP_MAX_ATTEMPTS,
+    max_pending=PREP_MAX_PENDING, on_failure=prepare_failed,
+)
+
+
+def enqueue(session_id: str) -> bool:
+    return prep_queue.submit(session_id, prepare_session, session_id)
+
+
+def prepare_from_bank(db: Session, s: InterviewSession) -> bool | None:
+    """
+    Fill a new session's questions from the question bank. Returns None on a
+    miss, otherwise whether the entry was stale (still used; call
+    enqueue_refresh() to regenerate it in the background).
+    """
+    qas, stale = question_bank.lookup(db, s.role, s.difficulty, s.domain, s.job_description)
+    if qas is None:
+        return None
+    _save_questions(db, s, qas)
+    return stale
+
+
+def enqueue_refresh(s: InterviewSession) -> bool:
+    key = "bank:" + question_bank.bank_key(s.role, s.difficulty, s.domain, s.job_description)
+    try:
+        return prep_queue.submit(key, refresh_bank, s.role, s.difficulty, s.domain, s.job_description)
+    except QueueFull:
+        return False
+
+
+def pending_session_ids() -> list[str]:
+    with Session(engine) as db:
+        return list(db.exec(select(InterviewSession.id).where(InterviewSession.status == "preparing")).all())
+
+
+async def recover():
+    """Re-queue sessions left in `preparing` by a previous process."""
+    ids = await executors.run_db(pending_session_ids)
+    for session_id in ids:
+        try:
+            enqueue(session_id)
+        except QueueFull:
+            break
+    if ids:
+        logger.info(f"Re-queued {len(ids)} sessions for preparation")
@@ -0,0 +1,105 @@
+import os, json
+from datetime import datetime
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from ..db import engine
+from ..models import InterviewState
+
+# sqlite - shared by every worker on the same database (needed to resume elsewhere)
+# memory - per process, for a single worker or tests
+SESSION_STATE_STORE = os.getenv("SESSION_STATE_STORE", "sqlite")
+# How long a dropped interview waits for a reconnect before it is finished and evaluated
+SESSION_RESUME_GRACE_SECONDS = float(os.getenv("SESSION_RESUME_GRACE_SECONDS", "120"))
+# An open socket touches its state this often, so a state nobody touches belongs to no socket
+SESSION_HEARTBEAT_SECONDS = float(os.getenv("SESSION_HEARTBEAT_SECONDS", "30"))
+# How often states left by a dead socket or process are looked for and their sessions finished
+SESSION_SWEEP_SECONDS = float(os.getenv("SESSION_SWEEP_SECONDS", "60"))
+
+
+class MemoryStateStore:
+    def __init__(self):
+        self._states: dict[str, str] = {}
+        self._updated: dict[str, datetime] = {}
+
+    def get(self, session_id: str) -> dict | None:
+        raw = self._states.get(session_id)
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, session_id: str, state: dict):
+        # serialized anyway, so callers can't mutate what was stored
+        self._states[session_id] = json.dumps(state)
+        self._updated[session_id] = datetime.utcnow()
+
+    def delete(self, session_id: str):
+        self._states.pop(session_id, None)
+        self._updated.pop(session_id, None)
+
+    def touch(self, session_id: str):
+        if session_id in self._updated:
+            self._updated[session_id] = datetime.utcnow()
+
+    def idle(self, before: datetime) -> list[tuple[str, dict, datetime]]:
+        return [(sid, json.loads(self._states[sid]), ts) for sid, ts in list(self._updated.items()) if ts < before]
+
+    def claim(self, session_id: str, before: datetime) -> bool:
+        ts = self._updated.get(session_id)
+        if ts is None or ts >= before:
+            return False
+        self._updated[session_id] = datetime.utcnow()
+        return True
+
+
+class SQLiteStateStore:
+    """One InterviewState row per live session, overwritten after every turn."""
+
+    def get(self, session_id: str) -> dict | None:
+        with Session(engine) as db:
+            row = db.get(InterviewState, session_id)
+            return json.loads(row.state_json) if row else None
+
+    def put(self, session_id: str, state: dict):
+        with Session(engine) as db:
+            row = db.get(InterviewState, session_id) or InterviewState(session_id=session_id, state_json="")
+            row.state_json = json.dumps(state)
+            row.updated_at = datetime.utcnow()
+            db.add(row)
+            db.commit()
+
+    def delete(self, session_id: str):
+        with Session(engine) as db:
+            row = db.get(InterviewState, session_id)
+            if row:
+                db.delete(row)
+                db.commit()
+
+    def touch(self, session_id: str):
+        with Session(engine) as db:
+            db.execute(
+                update(InterviewState).where(InterviewState.session_id == session_id)
+                .values(updated_at=datetime.utcnow())
+            )
+            db.commit()
+
+    def idle(self, before: datetime) -> list[tuple[str, dict, datetime]]:
+        """(session_id, state, updated_at) of every state not written since `before`."""
+        with Session(engine) as db:
+            rows = db.exec(select(InterviewState).where(InterviewState.updated_at < before)).all()
+            return [(r.session_id, json.loads(r.state_json), r.updated_at) for r in rows]
+
+    def claim(self, session_id: str, before: datetime) -> bool:
+        """
+        Take over a state not written since `before` by writing it now, in one
+        UPDATE: of several workers sweeping the same rows, one gets it.
+        """
+        with Session(engine) as db:
+            result = db.execute(
+                update(InterviewState)
+                .where(InterviewState.session_id == session_id, InterviewState.updated_at < before)
+                .values(updated_at=datetime.utcnow())
+            )
+            db.commit()
+            return result.rowcount == 1
+
+
+store = MemoryStateStore() if SESSION_STATE_STORE == "memory" else SQLiteStateStore()
@@ -0,0 +1,68 @@
+import os, asyncio, logging
+
+from . import tts, executors
+
+logger = logging.getLogger(__name__)
+
+# Synthesize the prompts a session may say next while the candidate is still answering
+TTS_PREFETCH = os.getenv("TTS_PREFETCH", "1") == "1"
+
+# process-wide counters: prompts served from a prefetch, and prefetched clips thrown away
+stats = {"hits": 0, "misses": 0, "discarded": 0}
+
+
+class SpeechPrefetcher:
+    """
+    Per-session lookahead buffer of synthesized prompts.
+
+    prefetch() starts synthesis of every candidate next prompt on the IO pool
+    (whole prompts for the URL path, sentences for the streamed path); take()
+    hands the jobs for the prompt actually chosen to the caller and cancels the
+    rest. A cancelled job that hasn't started never reaches Google; one that
+    has finished just leaves its clip in the TTS cache.
+    """
+
+    def __init__(self, stream: bool, enabled: bool = TTS_PREFETCH):
+        self.stream = stream
+        self.enabled = enabled
+        self._jobs: dict[str, asyncio.Future] = {}
+
+    def _pieces(self, text: str) -> list[str]:
+        return (tts.split_sentences(text) or [text]) if self.stream else [text]
+
+    def _synthesize(self, piece: str):
+        fn = tts.synthesize_cached if self.stream else tts.synthesize_url
+        job = asyncio.ensure_future(executors.run_io(fn, piece))
+        # nobody may ever await a discarded job; don't let its result warn
+        job.add_done_callback(lambda j: j.cancelled() or j.exception())
+        return job
+
+    def prefetch(self, texts: list[str]):
+        if not self.enabled:
+            return
+        for text in texts:
+            for piece in self._pieces(text):
+                if piece not in self._jobs:
+                    self._jobs[piece] = self._synthesize(piece)
+
+    def take(self, text: str) -> list[asyncio.Future]:
+        """One job per piece of text, prefetched where possible; everything else is discarded."""
+        jobs = []
+        hit = True
+        for piece in self._pieces(text):
+            job = self._jobs.pop(piece, None)
+            if job is None:
+                hit = False
+                job = self._synthesize(piece)
+            jobs.append(job)
+        if self.enabled:
+            stats["hits" if hit else "misses"] += 1
+        self.close()
+        return jobs
+
+    def close(self):
+        for job in self._jobs.values():
+            if not job.done():
+                job.cancel()
+            stats["discarded"] += 1
+        self._jobs.clear()
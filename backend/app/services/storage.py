@@ -2,32 +2,18 @@ from pathlib import Path
 import os, uuid
 from datetime import datetime
 
+from .metrics import span
+
 BASE = Path(os.getenv("DATA_DIR", "./data"))
 AUDIO_DIR = BASE/"audio"
 TTS_DIR = BASE/"tts"
+TTS_CACHE_DIR = TTS_DIR/"cache"
 TRANSCRIPTS_DIR = BASE/"transcripts"
+LLM_CACHE_DIR = BASE/"llm_cache"
 
-for d in [AUDIO_DIR, TTS_DIR, TRANSCRIPTS_DIR]:
+for d in [AUDIO_DIR, TTS_DIR, TTS_CACHE_DIR, TRANSCRIPTS_DIR, LLM_CACHE_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
-def session_audio_path(session_id: str) -> Path:
-    return AUDIO_DIR / f"{session_id}"
-
-def save_audio_chunk(session_id: str, audio_data: bytes) -> str:
-    # Create session directory if it doesn't exist
-    session_dir = AUDIO_DIR / session_id
-    session_dir.mkdir(exist_ok=True)
-    
-    # Save audio chunk with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    filename = f"chunk_{timestamp}.pcm"
-    filepath = session_dir / filename
-    
-    with open(filepath, "wb") as f:
-        f.write(audio_data)
-    
-    return str(filepath)
-
 def save_transcript(session_id: str, transcript: str) -> str:
     # Create session directory if it doesn't exist
     session_dir = TRANSCRIPTS_DIR / session_id
@@ -46,5 +32,10 @@ def save_transcript(session_id: str, transcript: str) -> str:
 def save_tts_bytes(b: bytes) -> str:
     fid = f"{uuid.uuid4()}.mp3"
     p = TTS_DIR / fid
-    p.write_bytes(b)
-    return f"/static/tts/{fid}"
\ No newline at end of file
+    with span("tts_file_write"):
+        p.write_bytes(b)
+    return f"/static/tts/{fid}"
+
+def tts_cache_url(key: str) -> str:
+    return f"/static/tts/cache/{key}.mp3"
+
@@ -1,4 +1,13 @@
 from datetime import datetime
+import struct
+
+# Binary WS frames: kind (u8), utterance id (u16), sequence number (u16), flags (u8), payload
+FRAME_HEADER = struct.Struct("!BHHB")
+FRAME_TTS_AUDIO = 1
+FLAG_LAST = 0x01
 
 def envelope(kind: str, payload: dict):
-    return {"type": kind, "ts": datetime.utcnow().isoformat(), "data": payload}
\ No newline at end of file
+    return {"type": kind, "ts": datetime.utcnow().isoformat(), "data": payload}
+
+def audio_frame(utterance: int, seq: int, last: bool, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(FRAME_TTS_AUDIO, utterance & 0xFFFF, seq & 0xFFFF, FLAG_LAST if last else 0) + payload
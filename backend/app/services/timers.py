@@ -0,0 +1,140 @@
+import os, math, asyncio, logging, inspect
+
+logger = logging.getLogger(__name__)
+
+TIMER_TICK_MS = int(os.getenv("TIMER_TICK_MS", "500"))
+TIMER_WHEEL_SLOTS = int(os.getenv("TIMER_WHEEL_SLOTS", "512"))
+# How often a live interview's remaining time is resent; clients count down in between
+TIMER_SYNC_SECONDS = float(os.getenv("TIMER_SYNC_SECONDS", "15"))
+
+
+class Timer:
+    __slots__ = ("fn", "args", "interval", "rounds", "cancelled")
+
+    def __init__(self, fn, args, interval):
+        self.fn = fn
+        self.args = args
+        self.interval = interval
+        self.rounds = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    One hashed timing wheel for every timer in the process, instead of a
+    sleeping task per socket.
+
+    Timers land in slot (now + delay/tick) % slots with a round count for
+    delays longer than one turn of the wheel. A single task advances one slot
+    per tick; everything due in that slot fires together: plain callbacks
+    inline, coroutine callbacks gathered in one task, so N sockets' sends are
+    one batch per tick. Resolution is one tick, and cancel() is O(1) (the
+    entry is dropped when its slot comes round).
+    """
+
+    def __init__(self, tick_ms: int = TIMER_TICK_MS, slots: int = TIMER_WHEEL_SLOTS):
+        self.tick = tick_ms / 1000
+        self._slots: list[list[Timer]] = [[] for _ in range(slots)]
+        self._now = 0
+        self._task: asyncio.Task | None = None
+        self._batches: set[asyncio.Task] = set()
+        self.active = 0
+        self.fired = 0
+        self.last_batch = 0
+        self.max_lag_ms = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def call_later(self, delay: float, fn, *args) -> Timer:
+        """Run fn(*args) (sync or async) once, delay seconds from now (rounded up to a tick)."""
+        return self._add(Timer(fn, args, None), delay)
+
+    def call_every(self, interval: float, fn, *args) -> Timer:
+        """Run fn(*args) every interval seconds until cancelled."""
+        return self._add(Timer(fn, args, interval), interval)
+
+    def _add(self, timer: Timer, delay: float) -> Timer:
+        if self._task is None:
+            self.start()
+        ticks = max(1, math.ceil(delay / self.tick))
+        timer.rounds = (ticks - 1) // len(self._slots)
+        self._slots[(self._now + ticks) % len(self._slots)].append(timer)
+        self.active += 1
+        return timer
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            lag = loop.time() - next_tick
+            self.max_lag_ms = max(self.max_lag_ms, lag * 1000)
+            # catch up on ticks missed while the loop was busy
+            due = []
+            while loop.time() >= next_tick:
+                due.extend(self._advance())
+                next_tick += self.tick
+            if due:
+                self._fire(due)
+
+    def _advance(self) -> list[Timer]:
+        self._now += 1
+        slot = self._slots[self._now % len(self._slots)]
+        keep, due = [], []
+        for timer in slot:
+            if timer.cancelled:
+                self.active -= 1
+            elif timer.rounds:
+                timer.rounds -= 1
+                keep.append(timer)
+            else:
+                self.active -= 1
+                due.append(timer)
+        slot[:] = keep
+        return due
+
+    def _fire(self, due: list[Timer]):
+        self.last_batch = len(due)
+        self.fired += len(due)
+        pending = []
+        for timer in due:
+            if timer.interval is not None:
+                self._add(timer, timer.interval)
+            try:
+                result = timer.fn(*timer.args)
+                if inspect.isawaitable(result):
+                    pending.append(result)
+            except Exception as e:
+                logger.error(f"Timer callback {timer.fn} failed: {e}")
+        if pending:
+            # one task per tick for the whole batch; a slow socket doesn't hold up the next tick
+            task = asyncio.create_task(self._collect(pending))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _collect(self, pending: list):
+        for r in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(r, Exception):
+                logger.error(f"Timer callback failed: {r}")
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "fired": self.fired,
+            "last_batch": self.last_batch,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
+
+
+wheel = TimerWheel()
@@ -1,36 +1,343 @@
-import os
-from google.cloud import texttospeech
+import os, re, json, time, hashlib, itertools, threading, logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-def synthesize(text: str) -> bytes:
-    json_path = os.path.join(os.path.dirname(__file__), "service_account.json")
-    try:
-        client = texttospeech.TextToSpeechClient.from_service_account_json(json_path)
+from . import storage
+from .disk_cache import DiskLRU
+from .metrics import span
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_CODE = "en-US"
+VOICE_NAME = "en-US-Chirp3-HD-Erinome"
+AUDIO_ENCODING = "MP3"
+SERVICE_ACCOUNT_JSON = os.getenv(
+    "TTS_SERVICE_ACCOUNT_JSON", os.path.join(os.path.dirname(__file__), "service_account.json")
+)
+
+TTS_POOL_SIZE = int(os.getenv("TTS_POOL_SIZE", "4"))
 
-        synthesis_input = texttospeech.SynthesisInput(text=text)
-        voice = texttospeech.VoiceSelectionParams(
-            language_code="en-US",
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+TTS_HOT_MAX_BYTES = int(os.getenv("TTS_HOT_MAX_BYTES", str(16 * 1024 * 1024)))
+
+
+class GoogleTTSBackend:
+    """One long-lived TextToSpeechClient (and its gRPC channel)."""
+
+    def __init__(self, json_path: str = SERVICE_ACCOUNT_JSON):
+        # imported with the first client, not at startup (grpc and protobufs are slow to load)
+        from google.cloud import texttospeech
+        self._tts = texttospeech
+        self.client = texttospeech.TextToSpeechClient.from_service_account_json(json_path)
+        self.voice = texttospeech.VoiceSelectionParams(
+            language_code=LANGUAGE_CODE,
             ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL,
-            name="en-US-Chirp3-HD-Erinome"
+            name=VOICE_NAME
         )
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3
+        self.audio_config = texttospeech.AudioConfig(
+            audio_encoding=getattr(texttospeech.AudioEncoding, AUDIO_ENCODING)
         )
 
-        response = client.synthesize_speech(
-            input=synthesis_input, voice=voice, audio_config=audio_config
+    def synthesize(self, text: str) -> bytes:
+        response = self.client.synthesize_speech(
+            input=self._tts.SynthesisInput(text=text), voice=self.voice, audio_config=self.audio_config
         )
-
         return response.audio_content
 
+    def healthy(self) -> bool:
+        try:
+            self.client.list_voices(language_code=LANGUAGE_CODE, timeout=5.0)
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        try:
+            self.client.transport.close()
+        except Exception:
+            pass
+
+
+class FakeTTSBackend:
+    """Offline stand-in: returns deterministic bytes after an optional delay."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def synthesize(self, text: str) -> bytes:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return b"FAKEMP3" + hashlib.sha256(text.encode("utf-8")).digest()
+
+    def healthy(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class TTSClientPool:
+    """
+    Round-robins calls over `size` backends, each created on first use.
+
+    gRPC clients are thread-safe, so a slot is shared rather than checked out;
+    several slots just spread load over separate channels. When a call fails the
+    slot is health-checked and, if unhealthy, dropped so the next call rebuilds it.
+    """
+
+    def __init__(self, factory, size: int):
+        self._factory = factory
+        self._slots = [None] * max(1, size)
+        self._failures = [0] * len(self._slots)
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _backend(self, i: int):
+        b = self._slots[i]
+        if b is None:
+            with self._lock:
+                b = self._slots[i]
+                if b is None:
+                    b = self._slots[i] = self._factory()
+        return b
+
+    def synthesize(self, text: str) -> bytes:
+        i = next(self._next) % len(self._slots)
+        b = self._backend(i)
+        try:
+            with span("tts_synthesize"):
+                audio = b.synthesize(text)
+        except Exception:
+            self._failed(i, b)
+            raise
+        self._failures[i] = 0
+        return audio
+
+    def _failed(self, i: int, b):
+        self._failures[i] += 1
+        if b.healthy():
+            return
+        logger.warning(f"TTS client {i} unhealthy after {self._failures[i]} failures; recreating")
+        with self._lock:
+            if self._slots[i] is b:
+                self._slots[i] = None
+        b.close()
+
+    def health(self) -> list[dict]:
+        return [
+            {"slot": i, "created": b is not None, "failures": self._failures[i]}
+            for i, b in enumerate(self._slots)
+        ]
+
+    def close(self):
+        with self._lock:
+            slots, self._slots = self._slots, [None] * len(self._slots)
+        for b in slots:
+            if b is not None:
+                b.close()
+
+
+pool = TTSClientPool(GoogleTTSBackend, TTS_POOL_SIZE)
+_fanout = ThreadPoolExecutor(max_workers=TTS_POOL_SIZE * 4, thread_name_prefix="tts-fanout")
+
+
+def set_pool(new_pool: TTSClientPool) -> TTSClientPool:
+    """Swap the backend pool (e.g. TTSClientPool(FakeTTSBackend, 1) in tests)."""
+    global pool
+    old, pool = pool, new_pool
+    return old
+
+
+# Fallback audio: half a second of MP3 silence, the same format as real clips
+# (the client plays every clip as audio/mpeg). Each 96-byte MPEG-1 Layer III
+# frame (32 kbps, 48 kHz, mono) with all-zero side info decodes to 1152 zero samples.
+_SILENT_MP3 = (b"\xff\xfb\x14\xc0" + bytes(92)) * 21
+
+
+def _silence() -> bytes:
+    return _SILENT_MP3
+
+
+def synthesize(text: str) -> bytes:
+    try:
+        return pool.synthesize(text)
     except Exception as e:
-        # fallback: half a second of silence
-        import numpy as np, soundfile as sf, io
-        sr = 22050
-        arr = np.zeros(int(sr * 0.5), dtype=np.float32)
-        buff = io.BytesIO()
-        sf.write(buff, arr, sr, format="WAV")
-        print(f"Error in TTS synthesis: {e}")
-        return buff.getvalue()
+        logger.error(f"Error in TTS synthesis: {e}")
+        return _silence()
+
+
+def synthesize_many(texts: list[str]) -> list[bytes]:
+    """Synthesize several texts concurrently over the pooled clients, in order."""
+    unique = list(dict.fromkeys(texts))
+    audio = dict(zip(unique, _fanout.map(synthesize, unique)))
+    return [audio[t] for t in texts]
+
+
+def cache_key(text: str) -> str:
+    """Hash of everything that affects the produced audio."""
+    raw = json.dumps({
+        "text": text,
+        "language_code": LANGUAGE_CODE,
+        "voice": VOICE_NAME,
+        "encoding": AUDIO_ENCODING,
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed store of synthesized audio.
+
+    Entries are files in storage.TTS_CACHE_DIR named by cache key, so a hit is
+    just the existing /static/tts/cache URL. The disk tier is a DiskLRU bounded
+    by max_bytes; a small in-process tier keeps the bytes of the most recent
+    entries.
+    """
+
+    def __init__(self, directory, max_bytes: int, hot_max_bytes: int):
+        self.hot_max_bytes = hot_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._hot: OrderedDict[str, bytes] = OrderedDict()
+        self._hot_bytes = 0
+        self.disk = DiskLRU(directory, ".mp3", max_bytes, on_evict=self._evicted)
+
+    def _evicted(self, keys: list[str]):
+        with self._lock:
+            for key in keys:
+                self._drop_hot(key)
+
+    def _drop_hot(self, key: str):
+        b = self._hot.pop(key, None)
+        if b is not None:
+            self._hot_bytes -= len(b)
+
+    def _remember(self, key: str, audio: bytes):
+        self._drop_hot(key)
+        self._hot[key] = audio
+        self._hot_bytes += len(audio)
+        while self._hot_bytes > self.hot_max_bytes and self._hot:
+            _, b = self._hot.popitem(last=False)
+            self._hot_bytes -= len(b)
+
+    def get_url(self, key: str) -> str | None:
+        found = self.disk.touch(key)
+        with self._lock:
+            if not found:
+                # never cached, or removed behind our back: the caller resynthesizes
+                self._drop_hot(key)
+                self.misses += 1
+                return None
+            if key in self._hot:
+                self._hot.move_to_end(key)
+            self.hits += 1
+        return storage.tts_cache_url(key)
+
+    def get_bytes(self, key: str) -> bytes | None:
+        with self._lock:
+            audio = self._hot.get(key)
+            if audio is not None:
+                self._hot.move_to_end(key)
+                self.hits += 1
+        if audio is not None:
+            self.disk.touch(key)
+            return audio
+        audio = self.disk.get(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes) -> str:
+        with span("tts_file_write"):
+            self.disk.put(key, audio)
+        with self._lock:
+            self._remember(key, audio)
+        return storage.tts_cache_url(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hot = {"hot_entries": len(self._hot), "hot_bytes": self._hot_bytes}
+            counts = {"hits": self.hits, "misses": self.misses}
+        return {**counts, **self.disk.stats(), **hot}
+
+
+cache = TTSCache(storage.TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, TTS_HOT_MAX_BYTES)
+
+
+def synthesize_url(text: str) -> str:
+    """
+    Return a /static URL for the spoken text, synthesizing only on a cache miss.
+    """
+    key = cache_key(text)
+    url = cache.get_url(key)
+    if url:
+        return url
+    try:
+        audio = pool.synthesize(text)
+    except Exception as e:
+        # the silent fallback is written uncached so a later call retries Google
+        logger.error(f"Error in TTS synthesis: {e}")
+        return storage.save_tts_bytes(_silence())
+    return cache.put(key, audio)
+
+
+def synthesize_cached(text: str) -> bytes:
+    """Like synthesize_url but returns the audio itself (hot tier first)."""
+    key = cache_key(text)
+    audio = cache.get_bytes(key)
+    if audio is not None:
+        return audio
+    try:
+        audio = pool.synthesize(text)
+    except Exception as e:
+        logger.error(f"Error in TTS synthesis: {e}")
+        return _silence()
+    cache.put(key, audio)
+    return audio
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", "12"))
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Split a prompt into sentence-sized pieces for streamed synthesis.
+    Fragments shorter than MIN_SENTENCE_CHARS are glued onto the next one so we
+    don't pay a round trip for "Ok." on its own.
+    """
+    parts = [p.strip() for p in _SENTENCE_END.split(text.strip()) if p.strip()]
+    out: list[str] = []
+    carry = ""
+    for p in parts:
+        carry = f"{carry} {p}".strip()
+        if len(carry) >= MIN_SENTENCE_CHARS:
+            out.append(carry)
+            carry = ""
+    if carry:
+        if out:
+            out[-1] = f"{out[-1]} {carry}"
+        else:
+            out.append(carry)
+    return out
+
+
+def prewarm(texts: list[str]):
+    # whole prompts for the URL path plus their sentences for the streamed path
+    pieces = list(dict.fromkeys(texts + [p for t in texts for p in split_sentences(t)]))
+    list(_fanout.map(synthesize_url, pieces))
+    logger.info(f"TTS cache prewarmed with {len(pieces)} clips: {cache.stats()}")
+
 
 
 
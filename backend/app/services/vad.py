@@ -0,0 +1,113 @@
+import os, logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 512  # 32 ms; also the window Silero expects at 16 kHz
+ENDPOINTING = os.getenv("ENDPOINTING", "1") == "1"
+ENDPOINT_ENERGY_DB = float(os.getenv("ENDPOINT_ENERGY_DB", "-45"))
+ENDPOINT_SILENCE_MS = int(os.getenv("ENDPOINT_SILENCE_MS", "600"))
+ENDPOINT_MIN_SPEECH_MS = int(os.getenv("ENDPOINT_MIN_SPEECH_MS", "300"))
+ENDPOINT_SILERO = os.getenv("ENDPOINT_SILERO", "0") == "1"
+ENDPOINT_SILERO_THRESHOLD = float(os.getenv("ENDPOINT_SILERO_THRESHOLD", "0.5"))
+
+SPEECH_START = "speech_start"
+END_OF_SPEECH = "end_of_speech"
+
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+class Endpointer:
+    """
+    Streaming end-of-speech detector for one PCM16 stream.
+
+    Incoming audio is cut into 32 ms frames and classified all at once with
+    numpy (frame energy in dBFS, optionally gated by Silero VAD). Once at least
+    min_speech_ms of speech has been heard, silence_ms of trailing silence ends
+    the utterance. feed() returns SPEECH_START / END_OF_SPEECH when either
+    happens, otherwise None.
+    """
+
+    def __init__(
+        self,
+        energy_db: float = ENDPOINT_ENERGY_DB,
+        silence_ms: int = ENDPOINT_SILENCE_MS,
+        min_speech_ms: int = ENDPOINT_MIN_SPEECH_MS,
+        use_silero: bool = ENDPOINT_SILERO,
+    ):
+        frame_ms = 1000 * FRAME_SAMPLES / SAMPLE_RATE
+        self.energy_db = energy_db
+        self.silence_frames = max(1, int(silence_ms / frame_ms))
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self._silero = _silero_model() if use_silero else None
+        self.reset()
+
+    @property
+    def uses_silero(self) -> bool:
+        # a model call per frame: callers on the event loop should run feed() on the cpu pool
+        return self._silero is not None
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.int16)
+        self.in_speech = False
+        self.speech_frames = 0
+        self.trailing_silence = 0
+        if self._silero is not None:
+            self._silero_state = self._silero.get_initial_states(batch_size=1)
+
+    def _speech_flags(self, frames: np.ndarray) -> np.ndarray:
+        power = np.mean(np.square(frames), axis=1)
+        flags = 10 * np.log10(power + 1e-12) > self.energy_db
+        if self._silero is not None:
+            # Silero is stateful, so it sees every frame even when energy already says no
+            state, context = self._silero_state
+            probs = np.empty(len(frames), dtype=np.float32)
+            for i, frame in enumerate(frames):
+                out, state, context = self._silero(frame, state, context, SAMPLE_RATE)
+                probs[i] = float(out[0, 0])
+            self._silero_state = (state, context)
+            flags &= probs >= ENDPOINT_SILERO_THRESHOLD
+        return flags
+
+    def feed(self, pcm: bytes | memoryview) -> str | None:
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        n = len(samples) // FRAME_SAMPLES
+        self._pending = samples[n * FRAME_SAMPLES:].copy()
+        if n == 0:
+            return None
+
+        frames = samples[:n * FRAME_SAMPLES].reshape(n, FRAME_SAMPLES) * _INT16_SCALE
+        flags = self._speech_flags(frames)
+
+        event = None
+        voiced = np.flatnonzero(flags)
+        if len(voiced):
+            self.speech_frames += len(voiced)
+            self.trailing_silence = n - 1 - int(voiced[-1])
+            if not self.in_speech and self.speech_frames >= self.min_speech_frames:
+                self.in_speech = True
+                event = SPEECH_START
+        else:
+            self.trailing_silence += n
+
+        if self.trailing_silence >= self.silence_frames:
+            if self.in_speech:
+                self.in_speech = False
+                self.speech_frames = 0
+                return END_OF_SPEECH
+            # scattered blips that never added up to speech
+            self.speech_frames = 0
+        return event
+
+
+_silero = None
+
+def _silero_model():
+    global _silero
+    if _silero is None:
+        from faster_whisper.vad import get_vad_model
+        _silero = get_vad_model()
+    return _silero
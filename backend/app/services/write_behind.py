@@ -0,0 +1,149 @@
+import os, asyncio, logging, time
+from sqlmodel import Session
+
+from ..db import engine
+from ..models import InterviewSession
+from . import executors, metrics
+
+logger = logging.getLogger(__name__)
+
+# Pending rows are committed together every WRITE_BEHIND_INTERVAL_MS, or as
+# soon as one session has WRITE_BEHIND_MAX_ROWS of them
+WRITE_BEHIND_INTERVAL_MS = int(os.getenv("WRITE_BEHIND_INTERVAL_MS", "250"))
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", "20"))
+
+
+class WriteBehind:
+    """
+    Buffers transcript rows and session field updates from the socket handlers
+    and writes them in grouped transactions on the db pool.
+
+    add()/update_session() never block; a flusher task commits whatever is
+    pending for every session in one transaction per tick. flush(session_id)
+    waits until everything queued for that session so far is committed (the
+    end of an interview calls it before anything reads the transcript). A
+    failed commit puts the rows back and is retried on the next tick.
+    """
+
+    def __init__(self, interval_ms: int = WRITE_BEHIND_INTERVAL_MS, max_rows: int = WRITE_BEHIND_MAX_ROWS):
+        self.interval = interval_ms / 1000
+        self.max_rows = max_rows
+        self._rows: dict[str, list] = {}
+        self._updates: dict[str, dict] = {}
+        self._lock: asyncio.Lock | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self._flush(list(self._rows) + list(self._updates))
+        except Exception:
+            pass  # logged
+
+    @property
+    def pending(self) -> int:
+        return sum(len(rows) for rows in self._rows.values()) + len(self._updates)
+
+    def add(self, session_id: str, row):
+        if self._task is None:
+            self.start()
+        rows = self._rows.setdefault(session_id, [])
+        rows.append(row)
+        if len(rows) >= self.max_rows:
+            self._wake.set()
+
+    def update_session(self, session_id: str, **fields):
+        """Set InterviewSession fields in the next flush (later calls win per field)."""
+        if self._task is None:
+            self.start()
+        self._updates.setdefault(session_id, {}).update(fields)
+
+    async def flush(self, session_id: str, attempts: int = 3):
+        if self._lock is None:
+            return
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self._flush([session_id])
+            except Exception:
+                if attempt == attempts:
+                    raise
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._rows or self._updates:
+                try:
+                    await self._flush(list(self._rows) + list(self._updates))
+                except Exception:
+                    pass  # logged; the rows are back in the buffer for the next tick
+
+    async def _flush(self, session_ids: list[str]):
+        async with self._lock:
+            rows, updates = [], {}
+            for sid in dict.fromkeys(session_ids):
+                rows.extend(self._rows.pop(sid, []))
+                if sid in self._updates:
+                    updates[sid] = self._updates.pop(sid)
+            if not rows and not updates:
+                return
+            t0 = time.perf_counter()
+            try:
+                await executors.run_db(_write, rows, updates)
+            except Exception as e:
+                logger.error(f"Write-behind flush of {len(rows)} rows failed: {e}")
+                self.errors += 1
+                for row in reversed(rows):
+                    self._rows.setdefault(row.session_id, []).insert(0, row)
+                for sid, fields in updates.items():
+                    self._updates[sid] = {**fields, **self._updates.get(sid, {})}
+                raise
+            self.flushes += 1
+            self.rows_written += len(rows)
+            self.last_flush_ms = (time.perf_counter() - t0) * 1000
+            metrics.stage_seconds.observe("db_commit", self.last_flush_ms / 1000)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+def _write(rows: list, updates: dict[str, dict]):
+    with Session(engine) as db:
+        for session_id, fields in updates.items():
+            s = db.get(InterviewSession, session_id)
+            if s is None:
+                continue
+            for name, value in fields.items():
+                setattr(s, name, value)
+            db.add(s)
+        db.add_all(rows)
+        db.commit()
+
+
+writer = WriteBehind()
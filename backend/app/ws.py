@@ -1,31 +1,167 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 from sqlmodel import Session, select
 from datetime import datetime, timedelta
 import asyncio, json, logging
 
-from .db import get_session
-from .models import InterviewSession, QAItem, Message, Evaluation
-from .services import storage, tts, evaluator, timeline
+from .db import engine
+from .models import InterviewSession, QAItem, Message
+from .services import tts, asr_stream, vad, timeline, executors, evaluation_queue, answer_scoring, write_behind, timers, session_state, speech_prefetch, metrics, audio_log
 from .crew.interview_crew import InterviewBrain, INTRO_TEMPLATE
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# open interview sockets in this process, for /metrics
+live_sockets = 0
+INTERVIEW_LENGTH = timedelta(minutes=15)
+
+
+def _load_session(session_id: str):
+    # Own short session: a per-request one would keep a pooled connection
+    # checked out for the whole life of the socket
+    with Session(engine) as db:
+        s = db.get(InterviewSession, session_id)
+        if not s or s.status not in ("ready", "live"):
+            return s, []
+        qas = db.exec(
+            select(QAItem).where(QAItem.session_id == session_id).order_by(QAItem.order_idx)
+        ).all()
+        return s, qas
+
+
+def _finalize(session_id: str, expected_scores: int = 0, audio_path: str | None = None):
+    # Own session: this outlives the socket handler if it gets cancelled mid-call
+    with Session(engine) as db:
+        s = db.get(InterviewSession, session_id)
+        s.status = "finished"
+        s.ended_at = datetime.now()
+        if audio_path:
+            s.audio_path = audio_path
+        db.add(s)
+        # evaluated by the evaluation queue; the job row survives a restart
+        evaluation_queue.add_job(db, session_id, expected_scores)
+        db.commit()
+
+
+async def _finish_session(session_id: str, scorer: answer_scoring.SessionScorer):
+    # the evaluation reads the transcript, so every buffered message goes in first
+    await write_behind.writer.flush(session_id)
+    # answers are scored as they come in, so this usually returns at once
+    await scorer.drain()
+    try:
+        # the answer audio's segments become one archival file per session
+        audio_path = await executors.run_io(audio_log.compact, session_id)
+    except Exception as e:
+        logger.error(f"Could not compact audio for session {session_id}: {e}")
+        audio_path = None
+    await executors.run_db(_finalize, session_id, len(scorer.answers), audio_path)
+    await executors.run_db(session_state.store.delete, session_id)
+    evaluation_queue.enqueue(session_id)
+
+
+async def _finish_if_abandoned(session_id: str, scorer: answer_scoring.SessionScorer, epoch: int):
+    # a reconnect (on any worker) bumps the epoch and takes over the session;
+    # the claim keeps another worker's sweep from finishing it as well
+    state = await executors.run_db(session_state.store.get, session_id)
+    if state is None or state["epoch"] != epoch:
+        return
+    # nothing of ours has written the row since the disconnect, at least a grace period ago;
+    # a sweep's claim or a reconnect wrote it just now
+    quiet = min(session_state.SESSION_HEARTBEAT_SECONDS, session_state.SESSION_RESUME_GRACE_SECONDS / 2)
+    if await executors.run_db(session_state.store.claim, session_id, datetime.utcnow() - timedelta(seconds=quiet)):
+        logger.info(f"Session {session_id} was not resumed, finishing it")
+        await _finish_session(session_id, scorer)
+
+
+def _saved_scorer(session_id: str, state: dict) -> answer_scoring.SessionScorer | None:
+    with Session(engine) as db:
+        s = db.get(InterviewSession, session_id)
+        if not s or s.status != "live":
+            return None
+    scorer = answer_scoring.SessionScorer(session_id, s.role, s.difficulty, [])
+    scorer.answers = {int(i): parts for i, parts in state["answers"].items()}
+    return scorer
+
+
+async def finish_abandoned() -> int:
+    """
+    Finish live sessions whose state no socket is touching any more: past the
+    resume grace period, or past their deadline. The grace timer covers this
+    while its process lives; this covers a restart inside the grace period.
+    """
+    now = datetime.utcnow()
+    heartbeat = timedelta(seconds=session_state.SESSION_HEARTBEAT_SECONDS)
+    grace = timedelta(seconds=max(session_state.SESSION_RESUME_GRACE_SECONDS, 2 * heartbeat.total_seconds()))
+    finished = 0
+    for session_id, state, updated_at in await executors.run_db(session_state.store.idle, now - 2 * heartbeat):
+        expired = now >= datetime.fromisoformat(state["started_at"]) + INTERVIEW_LENGTH
+        if not expired and updated_at >= now - grace:
+            continue
+        if not await executors.run_db(session_state.store.claim, session_id, now - (2 * heartbeat if expired else grace)):
+            continue
+        scorer = await executors.run_db(_saved_scorer, session_id, state)
+        if scorer is None:
+            # already finished (or gone); only the state row was left
+            await executors.run_db(session_state.store.delete, session_id)
+            continue
+        logger.info(f"Session {session_id} was abandoned, finishing it")
+        await _finish_session(session_id, scorer)
+        finished += 1
+    return finished
+
+
+async def sweep():
+    """Runs for the life of the app; the first pass picks up sessions a previous process left live."""
+    while True:
+        try:
+            await finish_abandoned()
+        except Exception as e:
+            logger.error(f"Abandoned session sweep failed: {e}")
+        await asyncio.sleep(session_state.SESSION_SWEEP_SECONDS)
+
+
+async def _stream_tts(ws: WebSocket, utterance: int, jobs: list[asyncio.Future]):
+    """
+    Send the prompt as one binary frame per sentence. All sentences are
+    synthesized concurrently (jobs, one per sentence, usually started early by
+    the prefetcher) and each frame goes out as soon as it and the ones before
+    it are ready, so playback can start after the first sentence.
+    """
+    await ws.send_json(timeline.envelope("interviewer_audio_stream", {
+        "utterance": utterance,
+        "chunks": len(jobs),
+        "format": tts.AUDIO_ENCODING.lower(),
+    }))
+    try:
+        for seq, job in enumerate(jobs):
+            audio = await job
+            await ws.send_bytes(timeline.audio_frame(utterance, seq, seq == len(jobs) - 1, audio))
+    finally:
+        for job in jobs:
+            job.cancel()
+
+
 @router.websocket("/ws/{session_id}")
-async def interview_ws(ws: WebSocket, session_id: str, db: Session = Depends(get_session)):
+async def interview_ws(ws: WebSocket, session_id: str):
+    global live_sockets
     await ws.accept()
     logger.info(f"WebSocket connection opened for session {session_id}")
+    live_sockets += 1
+    try:
+        await _interview(ws, session_id)
+    finally:
+        live_sockets -= 1
+
+
+async def _interview(ws: WebSocket, session_id: str):
 
-    s = db.get(InterviewSession, session_id)
+    s, qas = await executors.run_db(_load_session, session_id)
     if not s or s.status not in ("ready", "live"):
         await ws.send_json(timeline.envelope("status", {"error": "invalid_or_not_ready"}))
         await ws.close()
         return
 
-    qas = db.exec(
-        select(QAItem).where(QAItem.session_id == session_id).order_by(QAItem.order_idx)
-    ).all()
-
     qas_with_intro = [{"question": INTRO_TEMPLATE, "ideal_answer":(
     "A strong self-introduction should briefly cover:\n"
     "- Current role or academic background (e.g., 'I am a final year Computer Engineering undergraduate...').\n"
@@ -40,104 +176,240 @@ async def interview_ws(ws: WebSocket, session_id: str, db: Session = Depends(get
         s.role, s.difficulty, s.domain,
         qas_with_intro
     )
+    scorer = answer_scoring.SessionScorer(session_id, s.role, s.difficulty, qas_with_intro)
 
+    # A live session with saved state is a reconnect: pick up where the last
+    # socket (possibly on another worker) left off, clock included
+    state = await executors.run_db(session_state.store.get, session_id)
+    if state is not None:
+        brain.restore(state["brain"])
+        scorer.answers = {int(i): parts for i, parts in state["answers"].items()}
+        s.started_at = datetime.fromisoformat(state["started_at"])
+        epoch = state["epoch"] + 1
+        logger.info(f"Resuming session {session_id} at question {brain.current_question_index}")
+    else:
+        s.started_at = datetime.utcnow()
+        epoch = 1
     s.status = "live"
-    s.started_at = datetime.utcnow()
-    db.add(s)
-    db.commit()
+    # transcript rows and status changes are committed in batches by the write-behind buffer
+    write_behind.writer.update_session(session_id, status=s.status, started_at=s.started_at)
+
+    # ?audio=stream opts into binary sentence frames; otherwise the client gets a URL to fetch
+    stream_audio = ws.query_params.get("audio") == "stream"
+    utterance = 0
+    prefetcher = speech_prefetch.SpeechPrefetcher(stream_audio)
+
+    async def speak(text: str):
+        nonlocal utterance
+        utterance += 1
+        jobs = prefetcher.take(text)
+        with metrics.span("ws_speak"):
+            if stream_audio:
+                await _stream_tts(ws, utterance, jobs)
+            else:
+                tts_url = await jobs[0]
+                await ws.send_json(timeline.envelope("interviewer_audio", {"url": tts_url}))
+        # the candidate answers now; have whatever comes next ready by the time they finish
+        prefetcher.prefetch(brain.upcoming_prompts())
+
+    async def save_state():
+        with metrics.span("ws_save_state"):
+            await executors.run_db(session_state.store.put, session_id, {
+                "brain": brain.snapshot(),
+                "answers": scorer.answers,
+                "current_question": current_question,
+                "started_at": s.started_at.isoformat(),
+                "epoch": epoch,
+            })
 
-    deadline = s.started_at + timedelta(minutes=15)
-    first_prompt = brain.next_prompt(None)
+    deadline = s.started_at + INTERVIEW_LENGTH
+    if state is not None:
+        # ask again whatever was pending when the last socket dropped
+        first_prompt = state["current_question"]
+    else:
+        first_prompt = await executors.run_io(brain.next_prompt, None)
+    current_question = first_prompt
+    await save_state()
     await ws.send_json(timeline.envelope("interviewer_text", {"text": first_prompt}))
-    audio_bytes = tts.synthesize(first_prompt)
-    tts_url = storage.save_tts_bytes(audio_bytes)
-    await ws.send_json(timeline.envelope("interviewer_audio", {"url": tts_url}))
+    await speak(first_prompt)
 
     is_active = True
-    current_question = first_prompt
+    disconnected = False
+    handler = asyncio.current_task()
+    receiving = False
 
-    async def timer_task():
+    def end_interview():
+        # Stop after the current turn; if we're just waiting on the socket, stop now
         nonlocal is_active
-        while is_active:
-            remain = int((deadline - datetime.utcnow()).total_seconds())
-            if remain <= 0:
-                await ws.send_json(timeline.envelope("status", {"message": "Interview completed"}))
-                is_active = False
-                break
-            await ws.send_json(timeline.envelope("timer", {"remaining": remain}))
-            await asyncio.sleep(1)
+        is_active = False
+        if receiving:
+            handler.cancel()
+
+    async def send_remaining():
+        remain = max(0, int((deadline - datetime.utcnow()).total_seconds()))
+        await ws.send_json(timeline.envelope("timer", {"remaining": remain}))
+
+    async def expire():
+        try:
+            await ws.send_json(timeline.envelope("status", {"message": "Interview completed"}))
+        finally:
+            end_interview()
+
+    # The client counts down on its own; the shared timer wheel resyncs it now
+    # and then and enforces the cutoff
+    await send_remaining()
+    timer_sync = timers.wheel.call_every(timers.TIMER_SYNC_SECONDS, send_remaining)
+    timer_expiry = timers.wheel.call_later((deadline - datetime.utcnow()).total_seconds(), expire)
+    # tells finish_abandoned() this session still has a socket
+    heartbeat = timers.wheel.call_every(
+        session_state.SESSION_HEARTBEAT_SECONDS, executors.run_db, session_state.store.touch, session_id
+    )
+
+    # Candidate audio arrives as binary PCM16 frames; it is transcribed incrementally
+    # and the endpointer ends the turn on trailing silence
+    transcriber = asr_stream.StreamingTranscriber()
+    # and every frame is kept in the session's append-only audio log
+    audio = await executors.run_io(audio_log.open_log, session_id)
+    endpointer = vad.Endpointer() if vad.ENDPOINTING else None
+    asr_lock = asyncio.Lock()
+    partial_task = None
+
+    async def run_partial():
+        async with asr_lock:
+            partial = await transcriber.step()
+        if partial:
+            await ws.send_json(timeline.envelope("partial_transcript", {"text": partial}))
+
+    async def finish_transcript() -> str:
+        with metrics.span("ws_asr_finish"):
+            async with asr_lock:
+                return await transcriber.finish()
 
-    timer = asyncio.create_task(timer_task())
+    async def handle_answer(answer_text: str) -> bool:
+        """Record the answer and ask the next question. Returns False once the interview is over."""
+        with metrics.span("ws_turn"):
+            return await answer(answer_text)
+
+    async def answer(answer_text: str) -> bool:
+        nonlocal current_question
+        logger.info(f"Candidate answered: {answer_text}")
+
+        write_behind.writer.add(
+            session_id, Message(session_id=session_id, who="candidate", text=answer_text, ts=datetime.utcnow())
+        )
+
+        await ws.send_json(
+            timeline.envelope("transcript", {"who": "candidate", "text": answer_text})
+        )
+        # the brain's current question is the one being answered (follow-ups included)
+        scorer.add(brain.current_question_index, answer_text)
+        if not is_active:
+            # time ran out during this turn; expire() has already told the client
+            return False
+
+        with metrics.span("ws_next_prompt"):
+            next_prompt = await executors.run_io(brain.next_prompt, answer_text)
+        if next_prompt and next_prompt != current_question:
+            current_question = next_prompt
+            write_behind.writer.add(
+                session_id, Message(session_id=session_id, who="interviewer", text=next_prompt, ts=datetime.utcnow())
+            )
+            await save_state()
+            await ws.send_json(timeline.envelope("interviewer_text", {"text": next_prompt}))
+            await speak(next_prompt)
+            return True
+
+        await ws.send_json(timeline.envelope("status", {"message": "Interview completed"}))
+        return False
 
     try:
         while is_active:
+            receiving = True
             try:
-                msg = await asyncio.wait_for(ws.receive_text(), timeout=30.0)
-                data = json.loads(msg)
-
-                if data.get("type") == "candidate_text":
-                    answer_text = data["data"]["text"]
-                    logger.info(f"Candidate answered: {answer_text}")
-
-                    db.add(Message(session_id=session_id, who="candidate", text=answer_text, ts=datetime.utcnow()))
-                    db.commit()
-
-                    await ws.send_json(
-                        timeline.envelope("transcript", {"who": "candidate", "text": answer_text})
-                    )
-                    
-
-                    next_prompt = brain.next_prompt(answer_text)
-                    if next_prompt and next_prompt != current_question:
-                        current_question = next_prompt
-                        db.add(Message(session_id=session_id, who="interviewer", text=next_prompt, ts=datetime.utcnow()))
-                        db.commit()
-                        await ws.send_json(timeline.envelope("interviewer_text", {"text": next_prompt}))
-                        audio_bytes = tts.synthesize(next_prompt)
-                        tts_url = storage.save_tts_bytes(audio_bytes)
-                        await ws.send_json(timeline.envelope("interviewer_audio", {"url": tts_url}))
-                    else:
-                        await ws.send_json(timeline.envelope("status", {"message": "Interview completed"}))
+                msg = await ws.receive()
+            finally:
+                receiving = False
+            if msg["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(msg.get("code", 1000))
+
+            if msg.get("bytes") is not None:
+                pcm = msg["bytes"]
+                transcriber.feed(pcm)
+                if audio:
+                    audio.append(pcm)
+                    if audio.needs_flush:
+                        await executors.run_io(audio.flush)
+                event = None
+                if endpointer:
+                    # the energy gate alone is cheap enough to run inline; Silero is not
+                    event = (await executors.run_cpu(endpointer.feed, pcm) if endpointer.uses_silero
+                             else endpointer.feed(pcm))
+                if event == vad.END_OF_SPEECH and transcriber.has_audio:
+                    answer_text = await finish_transcript()
+                    if answer_text and not await handle_answer(answer_text):
                         is_active = False
+                    endpointer.reset()
+                elif transcriber.due() and (partial_task is None or partial_task.done()):
+                    partial_task = asyncio.create_task(run_partial())
+                continue
 
-                elif data.get("type") == "control" and data["data"].get("action") == "stop":
-                    await ws.send_json(timeline.envelope("status", {"message": "Interview completed"}))
+            data = json.loads(msg["text"])
+
+            if data.get("type") == "candidate_text":
+                # a client-side transcript supersedes any audio we were given
+                async with asr_lock:
+                    transcriber.reset()
+                if endpointer:
+                    endpointer.reset()
+                if not await handle_answer(data["data"]["text"]):
                     is_active = False
-                    break
 
-            except asyncio.TimeoutError:
-                continue
+            elif data.get("type") == "control" and data["data"].get("action") == "end_answer":
+                answer_text = await finish_transcript()
+                if endpointer:
+                    endpointer.reset()
+                if not await handle_answer(answer_text):
+                    is_active = False
+
+            elif data.get("type") == "control" and data["data"].get("action") == "stop":
+                await ws.send_json(timeline.envelope("status", {"message": "Interview completed"}))
+                is_active = False
+                break
 
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
+        disconnected = True
+    except asyncio.CancelledError:
+        if is_active:
+            raise
+        # cancelled by end_interview() while waiting for input
+        handler.uncancel()
     finally:
         is_active = False
-        timer.cancel()
+        timer_sync.cancel()
+        timer_expiry.cancel()
+        heartbeat.cancel()
+        prefetcher.close()
+        if partial_task:
+            partial_task.cancel()
         try:
-            s = db.get(InterviewSession, session_id)
-            s.status = "finished"
-            s.ended_at = datetime.now()
-            db.add(s)
-            db.commit()
-
-            all_msgs = db.exec(
-                select(Message).where(Message.session_id == session_id).order_by(Message.ts)
-            ).all()
-            transcript = "\n".join([f"{m.who.upper()}: {m.text}" for m in all_msgs])
-            ev = evaluator.evaluate_transcript(session_id, s.role, s.difficulty, s.domain, db)
-            db.add(
-                Evaluation(
-                    session_id=session_id,
-                    technical=ev["technical"],
-                    communication=ev.get("communication", 70),
-                    confidence=ev["confidence"],
-                    strengths=ev["strengths"],
-                    summary=ev["summary"],
-                    rubric_json=ev.get("rubric"),
+            if audio:
+                try:
+                    await executors.run_io(audio.close)
+                except Exception as e:
+                    logger.error(f"Could not flush audio for session {session_id}: {e}")
+            if disconnected and datetime.utcnow() < deadline:
+                # leave the session live for a reconnect; finish it if none comes
+                timers.wheel.call_later(
+                    session_state.SESSION_RESUME_GRACE_SECONDS, _finish_if_abandoned, session_id, scorer, epoch
                 )
-            )
-            db.commit()
+            else:
+                # shielded so a client hanging up mid-finalize still gets its evaluation queued
+                await asyncio.shield(asyncio.ensure_future(_finish_session(session_id, scorer)))
         except Exception as e:
             logger.error(f"Error during finalization: {e}")
         finally:
-            await ws.close()
+            # a dropped socket (the usual way into a resume) has nothing left to close,
+            # whether the drop showed up on a receive or on a send
+            if ws.client_state == WebSocketState.CONNECTED and ws.application_state == WebSocketState.CONNECTED:
+                await ws.close()
@@ -0,0 +1,241 @@
+"""
+Benchmark: Whisper decode cost by model size, compute type, thread count,
+chunk length and VAD, on bundled speech and synthetic audio.
+
+    cd backend && python -m bench.asr_bench [--models tiny,base,small] [--compute-types int8,float32]
+        [--threads 1,4] [--chunks 0.5,1,2,5,10,20,30] [--vad on,off] [--sources speech,synthetic]
+        [--repeat 3] [--out asr_bench.json] [--baseline old.json --tolerance 0.15]
+
+Every (model, compute type, threads) combination runs in a fresh interpreter
+(python -m bench.asr_bench --worker ...) with ASR_MODEL and ASR_CPU_THREADS
+set, so it loads the model through asr.get_model() like the app does and its
+peak RSS is its own. Chunks go through asr.transcribe_segments, the same call
+the socket path makes, with vad_filter on or off.
+
+Sources:
+  speech     the interviewer clips checked in under data/tts (real speech),
+             decoded to 16 kHz and cut into chunks of each length
+  synthetic  deterministic voiced-like bursts (a 140 Hz harmonic stack under a
+             syllable-rate envelope) with noise: available anywhere, and what
+             VAD has to decide about
+  silence    low-level noise only, the case vad_filter exists for
+
+For each row: latency p50/p95 in ms, real-time factor (latency / chunk
+length; below 1 is faster than real time), words out, model load time and the
+worker's peak RSS. thread_scaling gives the speedup of each thread count over
+the smallest one. The report is JSON with a fixed row layout, sorted, so runs
+diff cleanly; --baseline compares rtf_p50 row by row and exits 1 when any row
+got slower by more than --tolerance.
+"""
+import argparse, glob, json, os, resource, subprocess, sys, time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+SCHEMA = 1
+ROW_KEY = ("model", "compute_type", "threads", "source", "chunk_s", "vad")
+
+
+def _csv(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+# --- worker side -----------------------------------------------------------
+
+def speech_corpus(min_seconds: float) -> np.ndarray | None:
+    from faster_whisper import decode_audio
+    clips = []
+    total = 0
+    gap = np.zeros(int(SAMPLE_RATE * 0.3), dtype=np.float32)
+    for path in sorted(glob.glob(os.path.join("data", "tts", "*.mp3"))):
+        try:
+            audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+        except Exception:
+            continue
+        clips += [audio, gap]
+        total += len(audio) + len(gap)
+        if total >= min_seconds * SAMPLE_RATE:
+            break
+    return np.concatenate(clips).astype(np.float32) if clips else None
+
+
+def synthetic_corpus(seconds: float, voiced: bool) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    noise = rng.normal(0, 0.003, len(t))
+    if not voiced:
+        return noise.astype(np.float32)
+    pitch = 140 * (1 + 0.05 * np.sin(2 * np.pi * 0.3 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    # ~4 syllables a second, with a pause every couple of seconds
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.4 * t) > -0.6)
+    return (0.2 * voice * envelope + noise).astype(np.float32)
+
+
+def corpus(source: str, seconds: float) -> np.ndarray | None:
+    if source == "speech":
+        return speech_corpus(seconds)
+    if source == "synthetic":
+        return synthetic_corpus(seconds, voiced=True)
+    if source == "silence":
+        return synthetic_corpus(seconds, voiced=False)
+    raise ValueError(f"unknown source {source}")
+
+
+def worker(config: dict) -> dict:
+    # ASR_MODEL / ASR_CPU_THREADS are read at import
+    from app.services import asr
+
+    t0 = time.perf_counter()
+    asr.get_model()
+    load_s = time.perf_counter() - t0
+    # first decode initializes kernels and the VAD model; keep it out of the numbers
+    asr.transcribe_segments(synthetic_corpus(2, voiced=True), SAMPLE_RATE)
+
+    longest = max(config["chunks"])
+    rows = []
+    skipped = []
+    for source in config["sources"]:
+        audio = corpus(source, max(60.0, longest * config["repeat"]))
+        if audio is None:
+            skipped.append(source)
+            continue
+        for chunk_s in config["chunks"]:
+            n = int(chunk_s * SAMPLE_RATE)
+            # successive windows of the corpus (wrapping), so repeats aren't the same audio
+            starts = [(i * n) % max(1, len(audio) - n) for i in range(config["repeat"])]
+            for vad in config["vad"]:
+                times, words = [], []
+                for start in starts:
+                    clip = np.ascontiguousarray(audio[start:start + n])
+                    t = time.perf_counter()
+                    segments = asr.transcribe_segments(clip, SAMPLE_RATE, vad_filter=vad)
+                    times.append(time.perf_counter() - t)
+                    words.append(sum(len(text.split()) for _, _, text in segments))
+                times.sort()
+                p50 = times[len(times) // 2]
+                p95 = times[min(len(times) - 1, int(round(0.95 * len(times))) - 1)]
+                rows.append({
+                    "source": source,
+                    "chunk_s": chunk_s,
+                    "vad": vad,
+                    "runs": len(times),
+                    "latency_ms_p50": round(p50 * 1000, 1),
+                    "latency_ms_p95": round(p95 * 1000, 1),
+                    "rtf_p50": round(p50 / chunk_s, 4),
+                    "rtf_p95": round(p95 / chunk_s, 4),
+                    "words_mean": round(sum(words) / len(words), 1),
+                })
+    return {
+        "load_s": round(load_s, 2),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rows": rows,
+        "skipped_sources": skipped,
+    }
+
+
+# --- parent side -----------------------------------------------------------
+
+def run_config(model: str, compute_type: str, threads: int, args) -> dict:
+    env = dict(os.environ)
+    env["ASR_MODEL"] = f"{model}:{compute_type}"
+    env["ASR_CPU_THREADS"] = str(threads)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    config = {
+        "chunks": [float(c) for c in _csv(args.chunks)],
+        "vad": [v == "on" for v in _csv(args.vad)],
+        "sources": _csv(args.sources),
+        "repeat": args.repeat,
+    }
+    out = subprocess.run([sys.executable, "-m", "bench.asr_bench", "--worker", json.dumps(config)],
+                         env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"exit {out.returncode}"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def thread_scaling(rows: list[dict]) -> list[dict]:
+    groups: dict[tuple, dict[int, float]] = {}
+    for r in rows:
+        key = (r["model"], r["compute_type"], r["source"], r["chunk_s"], r["vad"])
+        groups.setdefault(key, {})[r["threads"]] = r["latency_ms_p50"]
+    out = []
+    for (model, compute_type, source, chunk_s, vad), by_threads in sorted(groups.items()):
+        if len(by_threads) < 2:
+            continue
+        base_threads = min(by_threads)
+        base = by_threads[base_threads]
+        out.append({
+            "model": model, "compute_type": compute_type, "source": source, "chunk_s": chunk_s, "vad": vad,
+            "speedup": {str(t): round(base / ms, 2) if ms else None for t, ms in sorted(by_threads.items())},
+        })
+    return out
+
+
+def compare(rows: list[dict], baseline_path: str, tolerance: float) -> list[dict]:
+    with open(baseline_path) as f:
+        baseline = {tuple(r[k] for k in ROW_KEY): r for r in json.load(f)["rows"]}
+    regressions = []
+    for r in rows:
+        old = baseline.get(tuple(r[k] for k in ROW_KEY))
+        if old and old["rtf_p50"] and r["rtf_p50"] > old["rtf_p50"] * (1 + tolerance):
+            regressions.append({**{k: r[k] for k in ROW_KEY},
+                                "rtf_p50": r["rtf_p50"], "baseline_rtf_p50": old["rtf_p50"]})
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--models", default="tiny,base,small")
+    ap.add_argument("--compute-types", default="int8,float32")
+    ap.add_argument("--threads", default=",".join(sorted({"1", str(os.cpu_count() or 1)}, key=int)))
+    ap.add_argument("--chunks", default="0.5,1,2,5,10,20,30", help="chunk lengths in seconds")
+    ap.add_argument("--vad", default="on,off")
+    ap.add_argument("--sources", default="speech,synthetic")
+    ap.add_argument("--repeat", type=int, default=3, help="chunks timed per row")
+    ap.add_argument("--out", help="also write the report here")
+    ap.add_argument("--baseline", help="earlier report to check rtf_p50 against")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(json.loads(args.worker))))
+        return
+
+    rows, configs = [], []
+    for model in _csv(args.models):
+        for compute_type in _csv(args.compute_types):
+            for threads in sorted(int(t) for t in _csv(args.threads)):
+                result = run_config(model, compute_type, threads, args)
+                configs.append({"model": model, "compute_type": compute_type, "threads": threads,
+                                **{k: v for k, v in result.items() if k != "rows"}})
+                for r in result.get("rows", []):
+                    rows.append({"model": model, "compute_type": compute_type, "threads": threads,
+                                 **r, "load_s": result["load_s"], "peak_rss_mb": result["peak_rss_mb"]})
+                print(f"{model}:{compute_type} x{threads}: "
+                      f"{result.get('error') or str(len(result['rows'])) + ' rows'}", file=sys.stderr)
+
+    rows.sort(key=lambda r: tuple(r[k] for k in ROW_KEY))
+    report = {
+        "schema": SCHEMA,
+        "cpu_count": os.cpu_count(),
+        "configs": configs,
+        "rows": rows,
+        "thread_scaling": thread_scaling(rows),
+    }
+    if args.baseline:
+        report["regressions"] = compare(rows, args.baseline, args.tolerance)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    failed = any("error" in c for c in configs) or bool(report.get("regressions"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
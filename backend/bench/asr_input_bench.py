@@ -0,0 +1,77 @@
+"""
+Microbenchmark: preparing a PCM16 chunk for Whisper via the old in-memory WAV
+path versus the np.frombuffer path in services/asr.py.
+
+    cd backend && python -m bench.asr_input_bench [--seconds 0.5 2 5 15] [--repeat 200]
+
+The WAV path is measured as "wrap + decode" (what faster-whisper does with a
+file-like input) when faster_whisper is installed, otherwise as wrap only.
+"""
+import argparse, io, json, time, wave
+import numpy as np
+
+from app.services.asr import pcm_to_float32, WHISPER_SAMPLE_RATE
+
+try:
+    from faster_whisper.audio import decode_audio
+except ImportError:
+    decode_audio = None
+
+
+def wav_path(pcm: bytes) -> np.ndarray | io.BytesIO:
+    wav_io = io.BytesIO()
+    with wave.open(wav_io, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(WHISPER_SAMPLE_RATE)
+        wf.writeframes(pcm)
+    wav_io.seek(0)
+    if decode_audio is None:
+        return wav_io
+    return decode_audio(wav_io, sampling_rate=WHISPER_SAMPLE_RATE)
+
+
+def numpy_path(pcm: bytes) -> np.ndarray:
+    return pcm_to_float32(pcm)
+
+
+def timeit(fn, arg, repeat: int) -> dict:
+    fn(arg)  # warm up (and size the scratch buffer)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return {
+        "mean_us": round(sum(times) / len(times) * 1e6, 1),
+        "p50_us": round(times[len(times) // 2] * 1e6, 1),
+        "p95_us": round(times[int(len(times) * 0.95) - 1] * 1e6, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, nargs="+", default=[0.5, 2.0, 5.0, 15.0, 30.0])
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for sec in args.seconds:
+        pcm = rng.integers(-3000, 3000, int(sec * WHISPER_SAMPLE_RATE), dtype=np.int16).tobytes()
+        wav = timeit(wav_path, pcm, args.repeat)
+        npy = timeit(numpy_path, pcm, args.repeat)
+        rows.append({
+            "seconds": sec,
+            "wav": wav,
+            "numpy": npy,
+            "speedup": round(wav["mean_us"] / max(npy["mean_us"], 0.1), 1),
+        })
+        print(f"{sec:5.1f}s  wav {wav['mean_us']:9.1f}us  numpy {npy['mean_us']:8.1f}us  x{rows[-1]['speedup']}")
+
+    print(json.dumps({"wav_includes_decode": decode_audio is not None, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark: transcript and results queries on a synthetic database, with and
+without the composite indexes on Message, QAItem and Evaluation.
+
+    cd backend && python -m bench.db_bench [--messages 1000000] [--sessions 5000] [--big-session 50000]
+
+Builds a throwaway SQLite file (default /tmp/db_bench.db), then times:
+  * the full transcript of one session, ordered by ts (GET .../messages)
+  * the candidate-only query build_qas runs
+  * a session's questions ordered by order_idx
+  * the results lookup (find_evaluation: newest row, and the row for the
+    current rubric version)
+  * the last page of a very long transcript via OFFSET versus a keyset cursor
+first without the indexes, then after the migration creates them (its run
+time is reported too). Prints a JSON report.
+"""
+import argparse, json, os, random, sqlite3, time, uuid
+from datetime import datetime, timedelta
+
+INDEXES = ["ix_message_session_ts", "ix_message_session_who_ts", "ix_qaitem_session_order",
+           "ix_evaluation_session"]
+
+
+def build(path: str, n_messages: int, n_sessions: int, big: int):
+    if os.path.exists(path):
+        os.remove(path)
+    from sqlmodel import SQLModel
+    from app.db import engine
+    import app.models  # noqa: F401  (registers the tables)
+    SQLModel.metadata.create_all(engine)
+
+    rng = random.Random(0)
+    session_ids = [str(uuid.uuid4()) for _ in range(n_sessions)]
+    t0 = datetime(2024, 1, 1)
+
+    def ts(ms: int) -> str:
+        # the format SQLAlchemy writes, so keyset comparisons see the same strings
+        return (t0 + timedelta(milliseconds=ms)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    con = sqlite3.connect(path)
+    con.executemany(
+        "INSERT INTO interviewsession (id, role, difficulty, status, created_at) VALUES (?, 'dev', 'mid', 'finished', ?)",
+        [(sid, ts(0)) for sid in session_ids],
+    )
+    con.executemany(
+        "INSERT INTO qaitem (session_id, question, ideal_answer, order_idx, ts) VALUES (?, ?, ?, ?, ?)",
+        [(sid, f"question {i}", "ideal", i, ts(0)) for sid in session_ids for i in range(8)],
+    )
+    # every session evaluated under rubric 1, every other one re-evaluated under 2
+    con.executemany(
+        "INSERT INTO evaluation (session_id, technical, strengths, confidence, communication, summary, "
+        "rubric_version, created_at) VALUES (?, 70, 'strengths', 70, 70, 'summary', ?, ?)",
+        [(sid, version, ts(0)) for i, sid in enumerate(session_ids)
+         for version in (("1", "2") if i % 2 else ("1",))],
+    )
+
+    def messages():
+        # sessions interleave in time, as they would in production
+        for i in range(n_messages - big):
+            sid = session_ids[i % n_sessions]
+            yield (sid, "candidate" if (i // n_sessions) % 2 else "interviewer", "x" * rng.randint(20, 200),
+                   ts(i * 10))
+        for i in range(big):
+            yield (session_ids[0], "candidate" if i % 2 else "interviewer", "y" * 50,
+                   ts((n_messages + i) * 10))
+
+    batch = []
+    for row in messages():
+        batch.append(row)
+        if len(batch) == 50_000:
+            con.executemany("INSERT INTO message (session_id, who, text, ts) VALUES (?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        con.executemany("INSERT INTO message (session_id, who, text, ts) VALUES (?, ?, ?, ?)", batch)
+    con.commit()
+    con.close()
+    return session_ids[0], session_ids[1:]
+
+
+def timeit(fn, repeat: int) -> dict:
+    fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return {
+        "p50_ms": round(times[len(times) // 2] * 1000, 3),
+        "p95_ms": round(times[max(0, int(len(times) * 0.95) - 1)] * 1000, 3),
+    }
+
+
+def run_queries(big_sid: str, sample: list[str], repeat: int, page: int) -> dict:
+    from sqlmodel import Session, select
+    from app.db import engine
+    from app.models import Message, QAItem
+    from app.services import pagination, evaluator
+
+    order = (Message.ts, Message.id)
+    it = iter(sample * (repeat + 1))
+
+    def transcript():
+        with Session(engine) as db:
+            db.exec(select(Message).where(Message.session_id == next(it)).order_by(*order)).all()
+
+    def candidate_answers():
+        with Session(engine) as db:
+            db.exec(select(Message).where(Message.session_id == next(it), Message.who == "candidate")
+                    .order_by(Message.ts)).all()
+
+    def questions():
+        with Session(engine) as db:
+            db.exec(select(QAItem).where(QAItem.session_id == next(it)).order_by(QAItem.order_idx)).all()
+
+    def results():
+        with Session(engine) as db:
+            evaluator.find_evaluation(db, next(it))
+
+    def results_for_version():
+        with Session(engine) as db:
+            evaluator.find_evaluation(db, next(it), "1")
+
+    with Session(engine) as db:
+        total = len(db.exec(select(Message.id).where(Message.session_id == big_sid)).all())
+        last_key = db.exec(
+            select(Message.ts, Message.id).where(Message.session_id == big_sid)
+            .order_by(*order).offset(total - page - 1).limit(1)
+        ).one()
+
+    def offset_page():
+        with Session(engine) as db:
+            db.exec(select(Message).where(Message.session_id == big_sid).order_by(*order)
+                    .offset(total - page).limit(page)).all()
+
+    def keyset_page():
+        with Session(engine) as db:
+            pagination.page(db, Message, [Message.session_id == big_sid], order, tuple(last_key), page)
+
+    return {
+        "transcript": timeit(transcript, repeat),
+        "candidate_answers": timeit(candidate_answers, repeat),
+        "questions": timeit(questions, repeat),
+        "results": timeit(results, repeat),
+        "results_for_version": timeit(results_for_version, repeat),
+        "last_page_offset": timeit(offset_page, max(3, repeat // 10)),
+        "last_page_keyset": timeit(keyset_page, max(3, repeat // 10)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default="/tmp/db_bench.db")
+    ap.add_argument("--messages", type=int, default=1_000_000)
+    ap.add_argument("--sessions", type=int, default=5000)
+    ap.add_argument("--big-session", type=int, default=50_000, help="messages in the one very long transcript")
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--page", type=int, default=100)
+    args = ap.parse_args()
+
+    # app.db reads DB_URL at import
+    os.environ["DB_URL"] = f"sqlite:///{args.db}"
+    from app.db import _migrate
+
+    t0 = time.perf_counter()
+    big_sid, rest = build(args.db, args.messages, args.sessions, args.big_session)
+    build_s = time.perf_counter() - t0
+    sample = random.Random(1).sample(rest, min(len(rest), 200))
+
+    con = sqlite3.connect(args.db)
+    for name in INDEXES:
+        con.execute(f"DROP INDEX IF EXISTS {name}")
+    con.commit()
+    con.close()
+    before = run_queries(big_sid, sample, args.repeat, args.page)
+
+    t0 = time.perf_counter()
+    _migrate()
+    migrate_s = time.perf_counter() - t0
+    after = run_queries(big_sid, sample, args.repeat, args.page)
+
+    print(json.dumps({
+        "messages": args.messages,
+        "sessions": args.sessions,
+        "big_session": args.big_session,
+        "build_s": round(build_s, 1),
+        "migrate_s": round(migrate_s, 2),
+        "without_indexes": before,
+        "with_indexes": after,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
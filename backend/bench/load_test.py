@@ -0,0 +1,412 @@
+"""
+Load test: N simulated candidates through POST /sessions/ and /ws/{session_id}
+against one server process whose LLM, TTS and ASR are fakes with set latencies.
+
+    cd backend && python -m bench.load_test [--candidates 50] [--turns 4] [--ramp 10]
+        [--llm-latency 2.0] [--tts-latency 0.3] [--asr-rtf 0.1] [--answer-seconds 5]
+        [--text] [--stream] [--out load_report.json] [--max-turn-p95-ms 0]
+
+The server runs in a subprocess (python -m bench.load_test --serve ...), so
+the candidates don't share its event loop or its memory. It installs the fakes
+through the app's own hooks (crew.llm.set_kickoff, tts.set_pool,
+asr_stream.set_decoder), runs a 50 ms event-loop lag probe, times every
+SQLAlchemy commit, and serves the numbers on /_loadtest/stats. Data and the
+SQLite file go to a throwaway directory.
+
+Each candidate creates a session with its own job description (so the question
+bank and LLM cache miss as they would for real traffic), waits for it to be
+ready, then per turn waits for the question's audio, answers for
+--answer-seconds (PCM16 sent in real time, or one candidate_text with --text),
+ends the answer and times how long the next question's text and audio take.
+Prints a JSON report (and writes it to --out); exits 1 when turn p95 is over
+--max-turn-p95-ms or any candidate failed.
+"""
+import argparse, asyncio, json, os, signal, socket, subprocess, sys, tempfile, threading, time
+import urllib.request
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 0.1
+WORDS_PER_SECOND = 2.5
+# InterviewBrain moves on after an answer of 10+ words and repeats the
+# follow-up otherwise, which ends the interview; every fake answer is this long
+MIN_ANSWER_WORDS = 12
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    v = sorted(values)
+
+    def rank(p: float) -> float:
+        return round(v[min(len(v) - 1, max(0, int(round(p * len(v))) - 1))], 2)
+
+    return {"count": len(v), "p50": rank(0.50), "p95": rank(0.95), "p99": rank(0.99), "max": round(v[-1], 2)}
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+# --- server side -----------------------------------------------------------
+
+class FakeLLM:
+    """crew.kickoff() stand-in: canned JSON for each prompt type after `latency` seconds."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __call__(self, crew) -> str:
+        time.sleep(self.latency)
+        task = crew.tasks[0]
+        description = task.description
+        if "interview questions" in description:
+            # distinct text per prompt, so TTS can't serve one candidate's questions from another's
+            tag = abs(hash(description)) % 10**8
+            return json.dumps([
+                {"question": f"Question {i} for candidate {tag}: walk me through a project you are proud of.",
+                 "ideal_answer": "A specific project, the candidate's role, trade-offs and the outcome."}
+                for i in range(1, 7)
+            ])
+        if "Score one answer" in description:
+            return json.dumps({"technical": 72, "communication": 75, "confidence": 70, "feedback": "Fake feedback."})
+        if "Summarize this interview" in description:
+            return json.dumps({"strengths": ["fake"], "summary": "Fake summary."})
+        return json.dumps({
+            "technical": 72, "communication": 75, "confidence": 70,
+            "strengths": ["fake"], "summary": "Fake evaluation.", "rubric": {"note": "fake"},
+        })
+
+
+def fake_transcribe(audio: np.ndarray, sample_rate: int, rtf: float) -> list[tuple[float, float, str]]:
+    duration = len(audio) / sample_rate
+    # holds a CPU pool thread like a real decode would
+    time.sleep(duration * rtf)
+    words = max(MIN_ANSWER_WORDS, int(duration * WORDS_PER_SECOND))
+    return [(0.0, duration, " ".join(["answer"] * words))]
+
+
+class ServerProbe:
+    """Event-loop lag, commit times and peak RSS inside the server process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.lag_ms: list[float] = []
+            self.commit_ms: list[float] = []
+            self.rss_baseline = rss_mb()
+            self.rss_peak = self.rss_baseline
+
+    def install_commit_timer(self):
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        @event.listens_for(Session, "before_commit")
+        def _before(session):
+            self._local.t0 = time.perf_counter()
+
+        @event.listens_for(Session, "after_commit")
+        def _after(session):
+            t0 = getattr(self._local, "t0", None)
+            if t0 is not None:
+                with self._lock:
+                    self.commit_ms.append((time.perf_counter() - t0) * 1000)
+                self._local.t0 = None
+
+    async def run(self, interval: float = 0.05):
+        loop = asyncio.get_running_loop()
+        ticks = 0
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected) * 1000
+            ticks += 1
+            with self._lock:
+                self.lag_ms.append(lag)
+                if ticks % 10 == 0:
+                    self.rss_peak = max(self.rss_peak, rss_mb())
+
+    def stats(self) -> dict:
+        with self._lock:
+            self.rss_peak = max(self.rss_peak, rss_mb())
+            return {
+                "loop_lag_ms": percentiles(self.lag_ms),
+                "db_commit_ms": percentiles(self.commit_ms),
+                "rss_mb_baseline": round(self.rss_baseline, 1),
+                "rss_mb_peak": round(self.rss_peak, 1),
+            }
+
+
+def serve(args):
+    import uvicorn
+    from app.main import app
+    from app.crew import llm
+    from app.services import tts, asr_stream, executors, timers
+
+    llm.set_kickoff(FakeLLM(args.llm_latency))
+    tts.set_pool(tts.TTSClientPool(lambda: tts.FakeTTSBackend(args.tts_latency), tts.TTS_POOL_SIZE))
+
+    async def decode(audio, sample_rate):
+        return await executors.run_cpu(fake_transcribe, audio, sample_rate, args.asr_rtf)
+
+    asr_stream.set_decoder(decode)
+
+    probe = ServerProbe()
+    probe.install_commit_timer()
+
+    @app.on_event("startup")
+    async def start_probe():
+        app.state.load_probe = asyncio.create_task(probe.run())
+
+    @app.get("/_loadtest/stats")
+    def loadtest_stats(reset: bool = False):
+        stats = probe.stats()
+        stats["executors"] = executors.stats()
+        stats["timers"] = timers.wheel.stats()
+        if reset:
+            probe.reset()
+        return stats
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", ws_max_size=16 * 1024 * 1024)
+
+
+# --- candidate side --------------------------------------------------------
+
+def _http(method: str, url: str, body: dict | None = None) -> dict:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read())
+
+
+async def http(method: str, url: str, body: dict | None = None) -> dict:
+    return await asyncio.to_thread(_http, method, url, body)
+
+
+class Candidate:
+    def __init__(self, idx: int, base: str, args, live: dict):
+        self.idx = idx
+        self.base = base
+        self.args = args
+        self.live = live
+        self.turn_ms: list[float] = []
+        self.text_ms: list[float] = []
+        self.prep_s = None
+        # a quiet tone: loud enough to count as speech, the fake ASR ignores its content
+        t = np.arange(int(SAMPLE_RATE * CHUNK_SECONDS)) / SAMPLE_RATE
+        self.chunk = (np.sin(2 * np.pi * 220 * t) * 3000).astype(np.int16).tobytes()
+
+    async def _until_audio(self, ws):
+        from app.services import timeline
+        while True:
+            msg = await ws.recv()
+            if isinstance(msg, bytes):
+                _, _, _, flags = timeline.FRAME_HEADER.unpack_from(msg)
+                if flags & timeline.FLAG_LAST:
+                    return
+                continue
+            kind = json.loads(msg)["type"]
+            if kind == "interviewer_audio" and not self.args.stream:
+                return
+            if kind == "status":
+                raise RuntimeError("interview ended early")
+
+    async def _until_text(self, ws) -> str | None:
+        while True:
+            msg = await ws.recv()
+            if isinstance(msg, bytes):
+                continue
+            data = json.loads(msg)
+            if data["type"] == "interviewer_text":
+                return data["data"]["text"]
+            if data["type"] == "status":
+                return None
+
+    async def _answer(self, ws):
+        if self.args.text:
+            await asyncio.sleep(self.args.answer_seconds)
+            words = max(MIN_ANSWER_WORDS, int(self.args.answer_seconds * WORDS_PER_SECOND))
+            await ws.send(json.dumps({"type": "candidate_text", "data": {"text": " ".join(["answer"] * words)}}))
+            return
+        for _ in range(int(self.args.answer_seconds / CHUNK_SECONDS)):
+            await ws.send(self.chunk)
+            await asyncio.sleep(CHUNK_SECONDS)
+        await ws.send(json.dumps({"type": "control", "data": {"action": "end_answer"}}))
+
+    async def run(self):
+        import websockets
+        t0 = time.perf_counter()
+        s = await http("POST", f"{self.base}/sessions/", {
+            "role": "Backend Engineer", "difficulty": "mid", "domain": "load test",
+            "job_description": f"Load test candidate {self.idx} {t0}",
+        })
+        sid = s["session_id"]
+        deadline = time.perf_counter() + self.args.prep_timeout
+        while s["status"] != "ready":
+            if s["status"] == "failed" or time.perf_counter() > deadline:
+                raise RuntimeError(f"session {sid} never became ready ({s['status']})")
+            await asyncio.sleep(0.1)
+            s = await http("GET", f"{self.base}/sessions/{sid}/status")
+        self.prep_s = time.perf_counter() - t0
+
+        ws_url = self.base.replace("http://", "ws://") + f"/ws/{sid}" + ("?audio=stream" if self.args.stream else "")
+        self.live["now"] += 1
+        self.live["peak"] = max(self.live["peak"], self.live["now"])
+        try:
+            async with websockets.connect(ws_url, max_size=None, open_timeout=30) as ws:
+                await self._until_audio(ws)
+                for _ in range(self.args.turns):
+                    await asyncio.sleep(self.args.think_seconds)
+                    await self._answer(ws)
+                    started = time.perf_counter()
+                    if await self._until_text(ws) is None:
+                        break
+                    self.text_ms.append((time.perf_counter() - started) * 1000)
+                    await self._until_audio(ws)
+                    self.turn_ms.append((time.perf_counter() - started) * 1000)
+                try:
+                    await ws.send(json.dumps({"type": "control", "data": {"action": "stop"}}))
+                    while True:
+                        await ws.recv()
+                except websockets.ConnectionClosed:
+                    pass
+        finally:
+            self.live["now"] -= 1
+
+
+async def drive(base: str, args) -> dict:
+    live = {"now": 0, "peak": 0}
+    candidates = [Candidate(i, base, args, live) for i in range(args.candidates)]
+    errors: list[str] = []
+
+    async def start(c: Candidate, delay: float):
+        await asyncio.sleep(delay)
+        try:
+            await c.run()
+        except Exception as e:
+            errors.append(f"candidate {c.idx}: {type(e).__name__}: {e}")
+
+    step = args.ramp / args.candidates if args.candidates else 0
+    t0 = time.perf_counter()
+    await asyncio.gather(*(start(c, i * step) for i, c in enumerate(candidates)))
+    elapsed = time.perf_counter() - t0
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "completed": args.candidates - len(errors),
+        "error_count": len(errors),
+        "errors": errors[:10],
+        "peak_live_sessions": live["peak"],
+        "turn_latency_ms": percentiles([ms for c in candidates for ms in c.turn_ms]),
+        "text_latency_ms": percentiles([ms for c in candidates for ms in c.text_ms]),
+        "prep_s": percentiles([c.prep_s for c in candidates if c.prep_s is not None]),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_up(base: str, proc: subprocess.Popen, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            _http("GET", f"{base}/")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--candidates", type=int, default=50)
+    ap.add_argument("--turns", type=int, default=4, help="answers per candidate (the fake LLM plans 6 questions)")
+    ap.add_argument("--ramp", type=float, default=10.0, help="seconds over which candidates join")
+    ap.add_argument("--answer-seconds", type=float, default=5.0)
+    ap.add_argument("--think-seconds", type=float, default=0.5)
+    ap.add_argument("--text", action="store_true", help="answer with candidate_text instead of audio")
+    ap.add_argument("--stream", action="store_true", help="use ?audio=stream")
+    ap.add_argument("--llm-latency", type=float, default=2.0)
+    ap.add_argument("--tts-latency", type=float, default=0.3)
+    ap.add_argument("--asr-rtf", type=float, default=0.1, help="fake decode time per second of audio")
+    ap.add_argument("--prep-timeout", type=float, default=120.0)
+    ap.add_argument("--max-turn-p95-ms", type=float, default=0.0, help="fail when turn p95 is above this (0: no budget)")
+    ap.add_argument("--out", help="also write the report here")
+    ap.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ)
+    env.update({
+        "DB_URL": f"sqlite:///{workdir}/load.db",
+        "DATA_DIR": f"{workdir}/data",
+        "ASR_PRELOAD": "0",
+        "ASR_PROCESSES": "0",
+        "ENDPOINTING": "0",
+        "LLM_CACHE": "off",
+    })
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    log_path = os.path.join(workdir, "server.log")
+    server_args = [
+        "--serve", "--port", str(port), "--llm-latency", str(args.llm_latency),
+        "--tts-latency", str(args.tts_latency), "--asr-rtf", str(args.asr_rtf),
+    ]
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen([sys.executable, "-m", "bench.load_test", *server_args],
+                                env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            _wait_up(base, proc)
+            idle = _http("GET", f"{base}/_loadtest/stats?reset=true")
+            client = asyncio.run(drive(base, args))
+            server = _http("GET", f"{base}/_loadtest/stats")
+        finally:
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    peak = client["peak_live_sessions"] or 1
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("serve", "port", "out")},
+        **client,
+        "loop_lag_ms": server["loop_lag_ms"],
+        "db_commit_ms": server["db_commit_ms"],
+        "rss_mb_idle": idle["rss_mb_peak"],
+        "rss_mb_peak": server["rss_mb_peak"],
+        "rss_mb_per_session": round(max(0.0, server["rss_mb_peak"] - idle["rss_mb_peak"]) / peak, 2),
+        "executors": server["executors"],
+        "server_log": log_path,
+    }
+    p95 = report["turn_latency_ms"].get("p95", 0.0)
+    report["within_budget"] = report["error_count"] == 0 and (not args.max_turn_p95_ms or p95 <= args.max_turn_p95_ms)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
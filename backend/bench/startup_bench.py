@@ -0,0 +1,90 @@
+"""
+Benchmark: cold import time and memory of the web app, checked against a budget.
+
+    cd backend && python -m bench.startup_bench [--runs 5] [--max-import-s 2.0] [--max-rss-mb 250]
+
+Each run imports app.main in a fresh interpreter (so nothing is cached in
+sys.modules) and records wall time for the import, RSS afterwards, and
+whether the heavy optional stacks (crewai, faster_whisper, google TTS) got
+loaded; they should only load on first use. The slowest modules come from
+python -X importtime. Prints a JSON report and exits 1 when the median is
+over budget, so it can run in CI.
+"""
+import argparse, json, os, subprocess, sys
+
+HEAVY = ["crewai", "litellm", "faster_whisper", "ctranslate2", "google.cloud.texttospeech", "google.generativeai"]
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - t0
+rss_kb = 0
+with open("/proc/self/status") as f:
+    for line in f:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+print(json.dumps({
+    "import_s": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "loaded": [m for m in HEAVY if m in sys.modules],
+}))
+"""
+
+
+def probe(env: dict) -> dict:
+    code = f"HEAVY = {HEAVY!r}\n" + PROBE
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, top: int) -> list[dict]:
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                         env=env, capture_output=True, text=True, check=True)
+    packages: dict[str, int] = {}
+    for line in out.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = line.replace("import time:", "|").split("|")
+        name = name.strip()
+        # one row per package root (fastapi, numpy, app.services.tts, ...), wherever it was first imported
+        if "." in name and not name.startswith("app."):
+            continue
+        packages[name] = max(packages.get(name, 0), int(cumulative_us))
+    packages.pop("app.main", None)
+    rows = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in rows]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--max-import-s", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_S", "2.0")))
+    ap.add_argument("--max-rss-mb", type=float, default=float(os.getenv("STARTUP_RSS_BUDGET_MB", "250")))
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("ASR_PRELOAD", "0")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+    runs = [probe(env) for _ in range(args.runs)]
+    import_s = sorted(r["import_s"] for r in runs)[len(runs) // 2]
+    rss_mb = sorted(r["rss_mb"] for r in runs)[len(runs) // 2]
+    report = {
+        "runs": args.runs,
+        "import_s_median": round(import_s, 3),
+        "import_s_min": round(min(r["import_s"] for r in runs), 3),
+        "rss_mb_median": round(rss_mb, 1),
+        "heavy_modules_loaded": runs[0]["loaded"],
+        "slowest_imports": slowest_imports(env, args.top),
+        "budget": {"import_s": args.max_import_s, "rss_mb": args.max_rss_mb},
+    }
+    report["within_budget"] = import_s <= args.max_import_s and rss_mb <= args.max_rss_mb
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,46 @@
+// Mono PCM16 at processorOptions.targetRate (the server's ASR wants 16 kHz),
+// posted as one ArrayBuffer per 20 ms. The context usually runs at 44.1/48 kHz;
+// each output sample is the average of the input samples it covers, which is
+// enough of a low-pass for speech.
 class RecorderProcessor extends AudioWorkletProcessor {
-  process(inputs, outputs) {
+  constructor(options) {
+    super();
+    const target = (options && options.processorOptions && options.processorOptions.targetRate) || sampleRate;
+    this.step = sampleRate / target;
+    this.phase = 0;
+    this.acc = 0;
+    this.count = 0;
+    this.chunk = new Int16Array(Math.round(target * 0.02));
+    this.fill = 0;
+  }
+
+  process(inputs) {
     const input = inputs[0];
     if (input.length > 0) {
       const inputChannel = input[0];
-      const pcm16 = new Int16Array(inputChannel.length);
-      
+
       for (let i = 0; i < inputChannel.length; i++) {
+        this.acc += inputChannel[i];
+        this.count++;
+        this.phase += 1;
+        if (this.phase < this.step) continue;
+        this.phase -= this.step;
+
         // Convert float32 to int16
-        pcm16[i] = Math.max(-32768, Math.min(32767, inputChannel[i] * 32768));
+        const sample = (this.acc / this.count) * 32768;
+        this.acc = 0;
+        this.count = 0;
+        this.chunk[this.fill++] = Math.max(-32768, Math.min(32767, sample));
+
+        if (this.fill === this.chunk.length) {
+          this.port.postMessage(this.chunk.buffer, [this.chunk.buffer]);
+          this.chunk = new Int16Array(this.chunk.length);
+          this.fill = 0;
+        }
       }
-      
-      this.port.postMessage(pcm16);
     }
     return true;
   }
 }
 
-registerProcessor('recorder-processor', RecorderProcessor);
\ No newline at end of file
+registerProcessor('recorder-processor', RecorderProcessor);
@@ -19,7 +19,7 @@ export default function InterviewPage() {
   return (
     <main className="mx-auto max-w-3xl p-6 space-y-4">
       <h1 className="text-2xl font-semibold">Live Interview</h1>
-      {ready && <AudioStreamer wsUrl={wsUrl(params.id as string)} />}
+      {ready && <AudioStreamer wsUrl={wsUrl(params.id as string)} sessionId={params.id as string} />}
       <p className="text-sm text-gray-500">Audio only. Ensure your microphone is enabled.</p>
       <a className="underline" href={`/results/${params.id}`}>View Results</a>
     </main>
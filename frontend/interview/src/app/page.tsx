@@ -16,6 +16,18 @@ export default function Home() {
       body: JSON.stringify({ role, difficulty, domain, job_description: jd }),
     });
     const data = await res.json();
+
+    // Questions are generated in the background; long-poll until the session is ready
+    let status = data.status;
+    while (status === "preparing") {
+      const r = await fetch(`http://localhost:8000/sessions/${data.session_id}/status?wait=25`);
+      status = (await r.json()).status;
+    }
+    if (status !== "ready") {
+      setLoading(false);
+      alert("Could not prepare the interview. Please try again.");
+      return;
+    }
     window.location.href = `/interview/${data.session_id}`;
   }
 
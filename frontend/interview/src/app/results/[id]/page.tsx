@@ -50,7 +50,7 @@ export default function ResultsPage() {
         setLoading(true);
         
         // Fetch evaluation results
-        const evalResponse = await fetch(`http://localhost:8000/results/${params.id}`);
+        const evalResponse = await fetch(`http://localhost:8000/results/${params.id}?wait=25`);
         if (evalResponse.ok) {
           const evalData = await evalResponse.json();
           setEvaluation(evalData);
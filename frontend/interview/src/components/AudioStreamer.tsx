@@ -27,12 +27,33 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
   const [interimTranscript, setInterimTranscript] = useState("");
   const [spaceBarPrompt, setSpaceBarPrompt] = useState(false);
   const [currentAnswer, setCurrentAnswer] = useState<string>("");
+  // Streamed interviewer audio: clips queued per sentence, played back to back
+  const audioQueueRef = useRef<string[]>([]);
+  const streamingRef = useRef(false);
+  const streamDoneRef = useRef(true);
+  const streamPlayingRef = useRef(false);
+  const streamUtteranceRef = useRef(-1);
+  // Candidate audio: the mic runs through recorder-processor.js for the whole session
+  // and its 16 kHz PCM frames go to the server only while it is the candidate's turn.
+  // Without a worklet we fall back to the browser's own speech recognition.
+  const micRef = useRef<MediaStream | null>(null);
+  const audioCtxRef = useRef<AudioContext | null>(null);
+  const serverAsrRef = useRef(false);
+  const sendingPcmRef = useRef(false);
+  const pcmSentRef = useRef(false);
 
   const addDebugInfo = (message: string) => {
     console.log(message);
     setDebugInfo(prev => [...prev.slice(-20), `${new Date().toLocaleTimeString()}: ${message}`]);
   };
 
+  // The server only resyncs the clock every few seconds; count down locally in between
+  useEffect(() => {
+    if (status !== "live") return;
+    const id = setInterval(() => setRemaining((r) => Math.max(0, r - 1)), 1000);
+    return () => clearInterval(id);
+  }, [status]);
+
   const connectWebSocket = () => {
     try {
       if (connectionAttempts >= maxConnectionAttempts) {
@@ -45,18 +66,20 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
       
       if (wsRef.current) wsRef.current.close();
       wsRef.current = new WebSocket(wsUrl);
+      wsRef.current.binaryType = "arraybuffer";
 
       wsRef.current.onopen = () => {
         addDebugInfo("WebSocket connection opened");
         setStatus("live");
         setConnectionAttempts(0);
-        initializeSpeechRecognition();
+        startMicrophone();
       };
 
       wsRef.current.onclose = (event) => {
         addDebugInfo(`WebSocket connection closed: ${event.code} - ${event.reason}`);
         setStatus("closed");
         stopSpeechRecognition();
+        stopMicrophone();
       };
 
       wsRef.current.onerror = (error) => {
@@ -66,27 +89,41 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
       };
 
       wsRef.current.onmessage = (ev) => {
-        if (typeof ev.data === "string") {
+        if (ev.data instanceof ArrayBuffer) {
+          handleAudioFrame(ev.data);
+        } else if (typeof ev.data === "string") {
           const msg = JSON.parse(ev.data);
           addDebugInfo(`Received message: ${msg.type}`);
 
           if (msg.type === "transcript") {
             const newTranscript = `${msg.data.who.toUpperCase()}: ${msg.data.text}`;
             setTranscripts((t) => [...t, newTranscript]);
+            if (msg.data.who === "candidate" && serverAsrRef.current) {
+              // the server ended the turn (trailing silence or end_answer)
+              stopSpeechRecognition();
+              setInterimTranscript("");
+              setSpaceBarPrompt(false);
+            }
+          } else if (msg.type === "partial_transcript") {
+            setInterimTranscript(msg.data.text);
           } else if (msg.type === "interviewer_text") {
             const newTranscript = `INTERVIEWER: ${msg.data.text}`;
             setTranscripts((t) => [...t, newTranscript]);
             setCurrentQuestion(msg.data.text);
+            sendingPcmRef.current = false;
             setIsListening(false);
             setSpaceBarPrompt(false);
           } else if (msg.type === "interviewer_audio") {
             handleAudioPlayback(msg.data.url);
+          } else if (msg.type === "interviewer_audio_stream") {
+            beginAudioStream(msg.data.utterance);
           } else if (msg.type === "timer") {
             setRemaining(msg.data.remaining);
           } else if (msg.type === "status") {
             setStatus(msg.data.message || "closed");
             if (["Interview completed", "finished"].includes(msg.data.message)) {
               stopSpeechRecognition();
+              stopMicrophone();
               addDebugInfo("Interview finished, redirecting to results page...");
               setTimeout(() => {
                 router.push(`/results/${sessionId}`);
@@ -102,6 +139,45 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
     }
   };
 
+  const startMicrophone = async () => {
+    try {
+      const stream = await navigator.mediaDevices.getUserMedia({
+        audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true },
+      });
+      const ctx = new AudioContext();
+      await ctx.audioWorklet.addModule("/recorder-processor.js");
+      const node = new AudioWorkletNode(ctx, "recorder-processor", {
+        processorOptions: { targetRate: 16000 },
+      });
+      node.port.onmessage = (ev: MessageEvent<ArrayBuffer>) => {
+        if (sendingPcmRef.current && wsRef.current?.readyState === WebSocket.OPEN) {
+          wsRef.current.send(ev.data);
+          pcmSentRef.current = true;
+        }
+      };
+      // the processor outputs nothing, but it only runs while connected to the graph
+      ctx.createMediaStreamSource(stream).connect(node).connect(ctx.destination);
+      // may start suspended when the page hasn't had a user gesture yet
+      ctx.resume().catch(() => {});
+      micRef.current = stream;
+      audioCtxRef.current = ctx;
+      serverAsrRef.current = true;
+      setIsRecording(true);
+      addDebugInfo(`Microphone streaming to server (${ctx.sampleRate} Hz -> 16000 Hz)`);
+    } catch (error) {
+      addDebugInfo(`Microphone streaming unavailable (${error}), using browser speech recognition`);
+      initializeSpeechRecognition();
+    }
+  };
+
+  const stopMicrophone = () => {
+    sendingPcmRef.current = false;
+    micRef.current?.getTracks().forEach((t) => t.stop());
+    micRef.current = null;
+    audioCtxRef.current?.close().catch(() => {});
+    audioCtxRef.current = null;
+  };
+
   const initializeSpeechRecognition = () => {
     const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
     if (!SpeechRecognition) {
@@ -146,6 +222,13 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
   };
 
   const startSpeechRecognition = () => {
+    if (serverAsrRef.current) {
+      pcmSentRef.current = false;
+      sendingPcmRef.current = true;
+      setIsListening(true);
+      addDebugInfo("Streaming answer audio");
+      return;
+    }
     if (!recognitionRef.current) return;
 
     if (isRecording) {
@@ -165,6 +248,11 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
 
 
   const stopSpeechRecognition = () => {
+    if (serverAsrRef.current) {
+      sendingPcmRef.current = false;
+      setIsListening(false);
+      return;
+    }
     if (recognitionRef.current && isRecording) {
       try {
         recognitionRef.current.stop();
@@ -177,30 +265,100 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
     }
   };
 
-  const handleAudioPlayback = (url: string) => {
-    setIsListening(false);
-    setSpaceBarPrompt(false);
-    
-    if (recognitionRef.current && isRecording) {
-      recognitionRef.current.stop();
+  const finishInterviewerAudio = () => {
+    addDebugInfo("Interviewer audio ended, enabling listening");
+    if (serverAsrRef.current || !isRecording) {
+      startSpeechRecognition();
     }
-    
+    setSpaceBarPrompt(true);
+  };
+
+  const getAudioElement = () => {
     if (!audioRef.current) {
       audioRef.current = new Audio();
       audioRef.current.onended = () => {
-        addDebugInfo("Interviewer audio ended, enabling listening");
-        if (!isRecording) {
-          startSpeechRecognition();
+        if (streamingRef.current) {
+          URL.revokeObjectURL(audioRef.current!.src);
+          playNextChunk();
+          return;
         }
-        setSpaceBarPrompt(true);
+        finishInterviewerAudio();
       };
+    }
+    return audioRef.current;
+  };
 
+  const resetAudioQueue = () => {
+    audioQueueRef.current.forEach((u) => URL.revokeObjectURL(u));
+    audioQueueRef.current = [];
+    streamPlayingRef.current = false;
+  };
+
+  const beginAudioStream = (utterance: number) => {
+    sendingPcmRef.current = false;
+    setIsListening(false);
+    setSpaceBarPrompt(false);
+    if (recognitionRef.current && isRecording) {
+      recognitionRef.current.stop();
+    }
+    getAudioElement().pause();
+    resetAudioQueue();
+    streamingRef.current = true;
+    streamDoneRef.current = false;
+    streamUtteranceRef.current = utterance;
+  };
+
+  const playNextChunk = () => {
+    const url = audioQueueRef.current.shift();
+    if (!url) {
+      streamPlayingRef.current = false;
+      if (streamDoneRef.current) {
+        streamingRef.current = false;
+        finishInterviewerAudio();
+      }
+      return;
+    }
+    streamPlayingRef.current = true;
+    const audio = getAudioElement();
+    audio.src = url;
+    audio.play().catch((error) => {
+      addDebugInfo(`Audio playback error: ${error}`);
+      playNextChunk();
+    });
+  };
+
+  // Frame layout (big-endian): kind u8, utterance u16, seq u16, flags u8, then MP3 bytes
+  const handleAudioFrame = (buf: ArrayBuffer) => {
+    const view = new DataView(buf);
+    if (view.byteLength < 6 || view.getUint8(0) !== 1) return;
+    const utterance = view.getUint16(1);
+    const seq = view.getUint16(3);
+    const last = (view.getUint8(5) & 1) === 1;
+    if (utterance !== streamUtteranceRef.current) return;
+
+    audioQueueRef.current.push(URL.createObjectURL(new Blob([buf.slice(6)], { type: "audio/mpeg" })));
+    addDebugInfo(`Audio chunk ${seq}${last ? " (last)" : ""} for utterance ${utterance}`);
+    if (last) streamDoneRef.current = true;
+    if (!streamPlayingRef.current) playNextChunk();
+  };
+
+  const handleAudioPlayback = (url: string) => {
+    sendingPcmRef.current = false;
+    setIsListening(false);
+    setSpaceBarPrompt(false);
+    
+    if (recognitionRef.current && isRecording) {
+      recognitionRef.current.stop();
     }
     
-    audioRef.current.pause();
-    audioRef.current.currentTime = 0;
-    audioRef.current.src = url;
-    audioRef.current.play().catch((error) => {
+    getAudioElement();
+    streamingRef.current = false;
+    resetAudioQueue();
+    
+    audioRef.current!.pause();
+    audioRef.current!.currentTime = 0;
+    audioRef.current!.src = url;
+    audioRef.current!.play().catch((error) => {
       addDebugInfo(`Audio playback error: ${error}`);
       setTimeout(() => {
         startSpeechRecognition();
@@ -210,7 +368,20 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
   };
 
   const handleSpaceBarPress = () => {
-    if (isListening) {
+    if (isListening && serverAsrRef.current) {
+      // nothing said yet: keep listening
+      if (!pcmSentRef.current || wsRef.current?.readyState !== WebSocket.OPEN) return;
+      // the server holds the transcript; ask it to close the turn now
+      sendingPcmRef.current = false;
+      wsRef.current.send(JSON.stringify({
+        type: "control",
+        data: { action: "end_answer" }
+      }));
+      addDebugInfo("Sent end of answer");
+      setIsListening(false);
+      setInterimTranscript("");
+      setSpaceBarPrompt(false);
+    } else if (isListening) {
       if (currentAnswer.trim() && wsRef.current?.readyState === WebSocket.OPEN) {
         wsRef.current.send(JSON.stringify({
           type: "candidate_text",
@@ -255,6 +426,7 @@ export default function AudioStreamer({ wsUrl, sessionId }: { wsUrl: string; ses
     return () => {
       if (wsRef.current) wsRef.current.close();
       stopSpeechRecognition();
+      stopMicrophone();
     };
   }, [wsUrl]);
 
@@ -1,4 +1,5 @@
 export function wsUrl(sessionId: string) {
   const base =  "ws://localhost:8000/ws";
-  return `${base}/${sessionId}`;
+  // audio=stream: interviewer audio arrives as binary sentence frames instead of a URL
+  return `${base}/${sessionId}?audio=stream`;
 }
\ No newline at end of file